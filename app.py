@@ -95,6 +95,18 @@ def check_api_key() -> bool:
     return True
 
 
+def get_llm_client(api_key: str) -> LLMClient:
+    """Get this session's LLM client, creating it on first use."""
+    client = st.session_state.get("llm_client")
+    # The key is kept alongside the client so a changed key builds a new one
+    if client is None or st.session_state.get("llm_client_api_key") != api_key:
+        client = LLMClient(api_key)
+        client.cache.prune()
+        st.session_state["llm_client"] = client
+        st.session_state["llm_client_api_key"] = api_key
+    return client
+
+
 def main():
     """Main application."""
     
@@ -244,7 +256,7 @@ def run_analysis(
         api_key = st.secrets["ANTHROPIC_API_KEY"]
         data_fetcher = DataFetcher(ticker)
         file_processor = FileProcessor()
-        llm_client = LLMClient(api_key)
+        llm_client = get_llm_client(api_key)
         
         # Fetch price data
         update_progress("Fetching price data...", 0.10)
@@ -258,7 +270,9 @@ def run_analysis(
         # Fetch financial data
         update_progress("Fetching financial data...", 0.15)
         financial_data = data_fetcher.format_financial_data_for_llm()
-        price_data = data_fetcher.format_price_data_for_llm()
+        # Computed once: summarized in price_data and used to grade the chart below
+        indicators = data_fetcher.get_technical_indicators()
+        price_data = data_fetcher.format_price_data_for_llm(indicators=indicators)
         
         # Check if pre-revenue
         is_pre_revenue = data_fetcher.is_pre_revenue()
@@ -303,6 +317,22 @@ def run_analysis(
             update_progress(message, llm_steps[idx][1])
             step_index[0] += 1
         
+        # Stream the investment summary into a preview while it is written,
+        # re-rendering on each new line or every 200 characters rather than
+        # on every delta
+        summary_preview = st.empty()
+        summary_text = [""]
+        rendered_len = [0]
+        
+        def show_summary_delta(text: str):
+            summary_text[0] += text
+            if "\n" in text or len(summary_text[0]) - rendered_len[0] >= 200:
+                summary_preview.markdown(summary_text[0])
+                rendered_len[0] = len(summary_text[0])
+        
+        # A chart whose indicators all agree is graded without an API call
+        technical_override = indicators.to_markdown() if indicators.is_decisive else None
+        
         # Run LLM analysis
         update_progress("Starting AI analysis...", 0.30)
         
@@ -313,7 +343,10 @@ def run_analysis(
             price_data=price_data,
             supplemental_contents=supplemental_contents if supplemental_contents else None,
             progress_callback=llm_progress,
+            on_delta=show_summary_delta,
+            technical_override=technical_override,
         )
+        summary_preview.empty()
         
         # Generate report
         update_progress("Generating report...", 0.95)
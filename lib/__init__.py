@@ -4,6 +4,10 @@ from .chart_builder import ChartBuilder
 from .llm_client import LLMClient
 from .file_processor import FileProcessor
 from .report_generator import ReportGenerator
+from .llm_cache import ResponseCache
+from .technical_indicators import TechnicalIndicators
+from .rate_limiter import TokenBucket
+from .compression import RelevanceCompressor
 
 __all__ = [
     "DataFetcher",
@@ -11,4 +15,8 @@ __all__ = [
     "LLMClient",
     "FileProcessor",
     "ReportGenerator",
+    "ResponseCache",
+    "TechnicalIndicators",
+    "TokenBucket",
+    "RelevanceCompressor",
 ]
@@ -0,0 +1,119 @@
+"""
+Compression Module
+
+Shrinks long documents to a character budget by keeping the passages most
+relevant to the analysis (Okapi BM25 against a query) instead of whatever
+happens to come first, then restores document order so the excerpt still
+reads top to bottom.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List
+
+_WORD = re.compile(r"[a-z0-9]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class RelevanceCompressor:
+    """Query-driven extractive compressor for prompt inputs."""
+
+    # Lines longer than this are split into sentences before scoring
+    MAX_UNIT_CHARS = 400
+
+    # Marks where passages were dropped between two kept ones
+    GAP_MARKER = "[...]"
+
+    def __init__(self, query: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the compressor.
+
+        Args:
+            query: Words describing what the excerpt should cover
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.terms = set(self._tokenize(query))
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return _WORD.findall(text.lower())
+
+    def _units(self, text: str) -> List[str]:
+        """Split text into lines, breaking long lines into sentences."""
+        units = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if len(line) > self.MAX_UNIT_CHARS:
+                units.extend(s for s in _SENTENCE_END.split(line) if s)
+            else:
+                units.append(line)
+        return units
+
+    def _scores(self, units: List[str]) -> List[float]:
+        """BM25 score of each unit against the query terms."""
+        tokenized = [self._tokenize(unit) for unit in units]
+        avg_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+        document_frequency = Counter(term for tokens in tokenized for term in set(tokens) & self.terms)
+        n = len(units)
+        idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+        scores = []
+        for tokens in tokenized:
+            counts = Counter(tokens)
+            norm = self.k1 * (1 - self.b + self.b * len(tokens) / avg_length)
+            scores.append(sum(
+                weight * counts[term] * (self.k1 + 1) / (counts[term] + norm)
+                for term, weight in idf.items()
+                if counts[term]
+            ))
+        return scores
+
+    def compress(self, text: str, max_chars: int) -> str:
+        """
+        Reduce text to at most max_chars, keeping the most relevant passages.
+
+        The first passage (usually a title or cover line) is always kept so
+        the model can still tell what kind of document it is reading.
+
+        Args:
+            text: Document text
+            max_chars: Character budget for the result
+
+        Returns:
+            The text unchanged if it fits, else the selected passages in document order
+        """
+        if len(text) <= max_chars:
+            return text
+        units = self._units(text)
+        if not units:
+            return text[:max_chars]
+
+        scores = self._scores(units)
+        ranked = [0] + sorted(range(1, len(units)), key=lambda i: (-scores[i], i))
+
+        kept, used = [], 0
+        for i in ranked:
+            cost = len(units[i]) + 1 + len(self.GAP_MARKER) + 1
+            if used + cost > max_chars:
+                continue
+            kept.append(i)
+            used += cost
+        if not kept:
+            return text[:max_chars]
+
+        lines, previous = [], -1
+        for i in sorted(kept):
+            if i != previous + 1:
+                lines.append(self.GAP_MARKER)
+            lines.append(units[i])
+            previous = i
+        return "\n".join(lines)
@@ -9,6 +9,8 @@ import pandas as pd
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from .technical_indicators import TechnicalIndicators
+
 
 class DataFetcher:
     """Fetches stock data from Yahoo Finance via yfinance."""
@@ -248,7 +250,7 @@ class DataFetcher:
 
         return "\n".join(lines)
 
-    def format_price_data_for_llm(self, days: int = 60) -> str:
+    def format_price_data_for_llm(self, days: int = 60, indicators: Optional[TechnicalIndicators] = None) -> str:
         df = self.get_price_history()
         
         if df.empty:
@@ -348,8 +350,15 @@ class DataFetcher:
                 f"Down Days: {down_days}",
             ])
         
+        indicator_text = (indicators or self.get_technical_indicators()).format_for_llm()
+        if indicator_text:
+            lines.extend(["", indicator_text])
+        
         return "\n".join(lines)
 
+    def get_technical_indicators(self) -> TechnicalIndicators:
+        return TechnicalIndicators(self.get_price_history())
+
     def is_pre_revenue(self, threshold: float = 1_000_000) -> bool:
         metrics = self.get_financial_data().get("key_metrics", {})
         revenue = metrics.get("total_revenue")
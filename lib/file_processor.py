@@ -3,13 +3,13 @@ File Processor Module
 
 Handles extraction of content from various file types:
 - PDFs: Extract text
-- Images: Return bytes for vision analysis
+- Images: Return bytes for vision analysis (downscaled when oversized)
 - CSV/Excel: Parse and summarize
 - Text files: Read content
 """
 
 import io
-from typing import Dict, Any, Optional, Union, BinaryIO
+from typing import Dict, Any, Optional, Tuple, Union, BinaryIO
 from pathlib import Path
 
 
@@ -38,6 +38,15 @@ class FileProcessor:
         "webp": "image/webp",
     }
 
+    # Bounds on the numeric statistics in CSV summaries; wider or longer
+    # frames add work without changing what the LLM sees
+    DESCRIBE_MAX_COLUMNS = 20
+    DESCRIBE_SAMPLE_ROWS = 10_000
+
+    # Longest image edge sent for vision analysis; the API downsizes larger
+    # images itself, so shrinking them here only saves upload bytes
+    MAX_IMAGE_EDGE = 1568
+
     def __init__(self):
         """Initialize the file processor."""
         pass
@@ -97,8 +106,7 @@ class FileProcessor:
             
             elif file_type == "image":
                 result["type"] = "image"
-                result["content"] = file_bytes
-                result["media_type"] = self.IMAGE_MIME_TYPES.get(ext, "image/png")
+                result["content"], result["media_type"] = self._prepare_image(file_bytes, ext)
             
             elif file_type == "data":
                 result["type"] = "text"
@@ -109,13 +117,56 @@ class FileProcessor:
             
             elif file_type == "text":
                 result["type"] = "text"
-                result["content"] = file_bytes.decode("utf-8", errors="replace")
+                # Most notes are plain ASCII, which skips the UTF-8 decoder entirely
+                if file_bytes.isascii():
+                    result["content"] = file_bytes.decode("ascii")
+                else:
+                    result["content"] = file_bytes.decode("utf-8", errors="replace")
             
         except Exception as e:
             result["error"] = f"Error processing file: {str(e)}"
         
         return result
 
+    def _prepare_image(self, file_bytes: bytes, ext: str) -> Tuple[bytes, str]:
+        """
+        Detect an image's real format and shrink it to MAX_IMAGE_EDGE.
+        
+        Args:
+            file_bytes: Image file content
+            ext: File extension, used for the MIME type when Pillow can't tell
+            
+        Returns:
+            Tuple of (image bytes, MIME type)
+        """
+        media_type = self.IMAGE_MIME_TYPES.get(ext, "image/png")
+        try:
+            from PIL import Image
+        except ImportError:
+            return file_bytes, media_type
+        
+        try:
+            with Image.open(io.BytesIO(file_bytes)) as image:
+                image_format = (image.format or "").lower()
+                media_type = self.IMAGE_MIME_TYPES.get(image_format, media_type)
+                if max(image.size) <= self.MAX_IMAGE_EDGE:
+                    return file_bytes, media_type
+                
+                # Palette images would be resized nearest-neighbour; chart text needs smoothing
+                if image.mode not in ("RGB", "RGBA", "L", "LA"):
+                    image = image.convert("RGBA")
+                image.thumbnail((self.MAX_IMAGE_EDGE, self.MAX_IMAGE_EDGE))
+                
+                out = io.BytesIO()
+                if image_format == "jpeg":
+                    image.convert("RGB").save(out, format="JPEG", quality=90)
+                    return out.getvalue(), "image/jpeg"
+                image.save(out, format="PNG", optimize=True)
+                return out.getvalue(), "image/png"
+        except Exception:
+            # Send anything Pillow can't read unchanged and let the API judge it
+            return file_bytes, media_type
+
     def _extract_pdf_text(self, file_bytes: bytes) -> str:
         """
         Extract text from a PDF file.
@@ -162,34 +213,34 @@ class FileProcessor:
             
             df = pd.read_csv(io.BytesIO(file_bytes))
             
-            lines = [
-                f"CSV Data Summary",
-                f"Rows: {len(df)}",
-                f"Columns: {len(df.columns)}",
-                f"Column names: {', '.join(df.columns.tolist())}",
-                "",
-                "Data types:",
-            ]
+            # Write straight into one buffer; to_string() can render into it directly
+            buf = io.StringIO()
+            w = buf.write
+            w("CSV Data Summary\n")
+            w(f"Rows: {len(df)}\n")
+            w(f"Columns: {len(df.columns)}\n")
+            w(f"Column names: {', '.join(df.columns.tolist())}\n")
+            w("\nData types:\n")
             
             for col in df.columns:
-                lines.append(f"  {col}: {df[col].dtype}")
+                w(f"  {col}: {df[col].dtype}\n")
             
-            lines.extend([
-                "",
-                "First 10 rows:",
-                df.head(10).to_string(),
-            ])
+            w("\nFirst 10 rows:\n")
+            df.head(10).to_string(buf)
             
-            # Add basic statistics for numeric columns
-            numeric_cols = df.select_dtypes(include=["number"]).columns
+            # Add basic statistics for numeric columns (bool/category are not
+            # "number" dtypes, and all-NaN columns have nothing to describe)
+            numeric_cols = df.select_dtypes(include=["number"]).columns[:self.DESCRIBE_MAX_COLUMNS]
             if len(numeric_cols) > 0:
-                lines.extend([
-                    "",
-                    "Numeric column statistics:",
-                    df[numeric_cols].describe().to_string(),
-                ])
+                sample = df
+                if len(df) > self.DESCRIBE_SAMPLE_ROWS:
+                    sample = df.sample(n=self.DESCRIBE_SAMPLE_ROWS, random_state=0)
+                stats_df = sample[numeric_cols].dropna(axis=1, how="all")
+                if len(stats_df.columns) > 0:
+                    w("\n\nNumeric column statistics:\n")
+                    stats_df.describe().to_string(buf)
             
-            return "\n".join(lines)
+            return buf.getvalue()
             
         except ImportError:
             return "[pandas not installed. Cannot process CSV.]"
@@ -213,27 +264,23 @@ class FileProcessor:
             xlsx = pd.ExcelFile(io.BytesIO(file_bytes))
             sheet_names = xlsx.sheet_names
             
-            lines = [
-                f"Excel File Summary",
-                f"Number of sheets: {len(sheet_names)}",
-                f"Sheet names: {', '.join(sheet_names)}",
-            ]
+            buf = io.StringIO()
+            w = buf.write
+            w("Excel File Summary\n")
+            w(f"Number of sheets: {len(sheet_names)}\n")
+            w(f"Sheet names: {', '.join(sheet_names)}")
             
             for sheet_name in sheet_names:
                 df = pd.read_excel(xlsx, sheet_name=sheet_name)
                 
-                lines.extend([
-                    "",
-                    f"=== Sheet: {sheet_name} ===",
-                    f"Rows: {len(df)}",
-                    f"Columns: {len(df.columns)}",
-                    f"Column names: {', '.join(df.columns.astype(str).tolist())}",
-                    "",
-                    "First 10 rows:",
-                    df.head(10).to_string(),
-                ])
+                w(f"\n\n=== Sheet: {sheet_name} ===\n")
+                w(f"Rows: {len(df)}\n")
+                w(f"Columns: {len(df.columns)}\n")
+                w(f"Column names: {', '.join(df.columns.astype(str).tolist())}\n")
+                w("\nFirst 10 rows:\n")
+                df.head(10).to_string(buf)
             
-            return "\n".join(lines)
+            return buf.getvalue()
             
         except ImportError:
             return "[pandas/openpyxl not installed. Cannot process Excel.]"
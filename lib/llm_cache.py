@@ -0,0 +1,208 @@
+"""
+LLM Cache Module
+
+Content-addressed cache for Claude responses. A bounded in-memory LRU
+sits in front of a directory of small JSON files so repeat analyses
+survive app restarts. Every entry carries its own expiry time.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Protocol, Tuple
+
+# (expires_at, value)
+Entry = Tuple[float, Any]
+
+
+class CacheBackend(Protocol):
+    """Storage tier used by ResponseCache."""
+
+    def get(self, key: str) -> Optional[Entry]: ...
+
+    def set(self, key: str, entry: Entry) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """In-process LRU tier; evicts the least recently used entry when full."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileBackend:
+    """One JSON file per entry under a cache directory."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Entry]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data["expires"], data["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def set(self, key: str, entry: Entry) -> None:
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(key).with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires": entry[0], "value": entry[1]}, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError) as e:
+            print(f"Error writing LLM cache entry: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.cache_dir.glob("*.json")) if self.cache_dir.exists() else 0
+
+    def prune(self, now: float) -> int:
+        """Delete entries that expired before now (and unreadable files); returns the count."""
+        removed = 0
+        for path in self.cache_dir.glob("*.json") if self.cache_dir.exists() else ():
+            entry = self.get(path.stem)
+            if entry is None or entry[0] < now:
+                self.delete(path.stem)
+                removed += 1
+        return removed
+
+
+class ResponseCache:
+    """Tiered cache for LLM responses, checked fastest tier first."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = ".cache/llm",
+        default_ttl: int = 86400,
+        max_memory_entries: int = 256,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory for on-disk entries (None = memory only)
+            default_ttl: Seconds an entry stays valid unless overridden
+            max_memory_entries: Entries kept in the in-memory LRU tier
+        """
+        self.default_ttl = default_ttl
+        self.tiers: List[CacheBackend] = [MemoryBackend(max_memory_entries)]
+        if cache_dir:
+            self.tiers.append(FileBackend(cache_dir))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Build a cache key from request parameters.
+
+        Args:
+            *parts: Values that identify the request (model, prompt, ...)
+
+        Returns:
+            Hex digest of the parts
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            if not isinstance(part, str):
+                part = json.dumps(part, sort_keys=True, default=str)
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached value, or None if missing or expired
+        """
+        for depth, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is None:
+                continue
+            if entry[0] < time.time():
+                self.delete(key)
+                break
+            # Promote into the faster tiers that missed
+            for faster in self.tiers[:depth]:
+                faster.set(key, entry)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """
+        Store a JSON-serializable value.
+
+        Args:
+            key: Cache key from make_key
+            value: Value to store
+            ttl: Seconds until expiry (None = default_ttl)
+        """
+        entry = (time.time() + (self.default_ttl if ttl is None else ttl), value)
+        for tier in self.tiers:
+            tier.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry from every tier."""
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def prune(self) -> int:
+        """
+        Drop expired entries from the on-disk tier.
+
+        Entries otherwise only expire when looked up again, so responses for
+        prompts that never recur would accumulate forever.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        return sum(tier.prune(now) for tier in self.tiers if isinstance(tier, FileBackend))
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the number of entries held in memory."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.tiers[0])}
@@ -1,81 +1,77 @@
 """
 LLM Client Module - DEEP ANALYSIS VERSION
 
-Prioritizes depth over speed. Makes 4 focused API calls with delays
-between them to stay within 30k tokens/minute rate limit.
+Prioritizes depth over speed. Makes 4 focused API calls: the financial,
+technical and competitive analyses are independent and run concurrently,
+then the investment summary is written from their output. Rate limits
+are absorbed by the retry in _call_api rather than fixed sleeps.
 
-Total time: ~4-5 minutes for a comprehensive report.
+Total time: ~1-2 minutes for a comprehensive report.
 """
 
 import anthropic
-from typing import Optional, Dict, Any, List
+import asyncio
+import base64
+import contextvars
+import functools
+import hashlib
+import importlib.util
+import inspect
+import io
+import random
+import re
 import time
-import sys
-from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable
 from datetime import datetime
 
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from prompts.metrics import METRICS, render_metrics_table
 
+from .compression import RelevanceCompressor
+from .llm_cache import ResponseCache
+from .rate_limiter import TokenBucket
 
-class LLMClient:
-    """Claude API client optimized for deep analysis within rate limits."""
+# Set for the duration of a force_refresh run; tasks inherit it from the run
+_CACHE_BYPASS: contextvars.ContextVar = contextvars.ContextVar("llm_cache_bypass", default=False)
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = model
-        self.call_delay = 60  # seconds between calls to reset rate limit
+# Per-run receiver for stage timings (the on_metrics argument of arun_full_analysis)
+_METRICS_SINK: contextvars.ContextVar = contextvars.ContextVar("llm_metrics_sink", default=None)
 
-    def _call_api(self, prompt: str, max_tokens: int = 1500) -> str:
-        """Make API call with retry on rate limit."""
-        for attempt in range(3):
-            try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=max_tokens,
-                    temperature=0.2,
-                    messages=[{"role": "user", "content": prompt}],
-                )
-                return "".join(b.text for b in response.content if hasattr(b, "text"))
-            except anthropic.RateLimitError:
-                if attempt < 2:
-                    time.sleep(65)
-                    continue
-                raise
-        return "[API call failed]"
 
-    def run_full_analysis(
-        self,
-        ticker: str,
-        company_name: str,
-        financial_data: str,
-        price_data: str,
-        supplemental_contents: Optional[List[Dict[str, Any]]] = None,
-        progress_callback: Optional[callable] = None,
-    ) -> Dict[str, str]:
-        """
-        Run comprehensive analysis with 4 focused API calls.
-        
-        Call 1: Deep Financial Analysis
-        Call 2: Technical Analysis  
-        Call 3: Competitive Moat Analysis
-        Call 4: Investment Summary
-        """
-        
-        results = {}
-        
-        # ==========================================
-        # CALL 1: DEEP FINANCIAL ANALYSIS
-        # ==========================================
-        if progress_callback:
-            progress_callback("Performing deep financial analysis (1/4)...")
-        
-        financial_prompt = f"""You are a financial analyst performing due diligence on {company_name} ({ticker}).
+def _emit_metrics(**metrics: Any) -> None:
+    """Pass one stage's timings to the current run's on_metrics callback, if any."""
+    sink = _METRICS_SINK.get()
+    if sink is not None:
+        sink(metrics)
+
+# Style rules common to every call. System text precedes the messages, so
+# it also sits inside each call's cached prefix.
+_SYSTEM_PROMPT = (
+    "You are an equity research analyst writing one part of an investment report. "
+    "Follow the requested headings and format, cite specific numbers from the data provided, "
+    "and skip preamble and closing remarks."
+)
+
+_IMAGE_PROMPT_TEMPLATE = """Analyze this image ({source_name}) for {company_name} ({ticker}) investment research.
+
+1. What does this image show?
+2. Key observations relevant to investment thesis
+3. Any specific levels, patterns, or data points of note
+4. Bullish/Bearish/Neutral implication
+
+{length_directive}"""
 
-Here is the financial data:
 
+_SHARED_DATA_TEMPLATE = """Company: {company_name} ({ticker})
+
+FINANCIAL DATA:
 {financial_data}
 
-Provide a THOROUGH financial analysis covering:
+PRICE DATA:
+{price_data}"""
+
+_FINANCIAL_PROMPT_TEMPLATE = """You are a financial analyst performing due diligence on {company_name} ({ticker}).
+
+Using the financial data above, provide a THOROUGH financial analysis covering:
 
 ## Revenue & Growth Analysis
 - Current revenue scale and trajectory
@@ -105,43 +101,23 @@ Provide a THOROUGH financial analysis covering:
 Rate the overall financial health: STRONG / ADEQUATE / CONCERNING / WEAK
 Explain your rating in 2-3 sentences.
 
-## Key Metrics Summary Table
-| Metric | Value | Assessment |
-|--------|-------|------------|
-| Revenue | [value] | [context] |
-| Revenue Growth | [value] | Strong (>15%) / Moderate (5-15%) / Weak (<5%) |
-| Gross Margin | [value] | [vs industry expectation] |
-| Operating Margin | [value] | [trend] |
-| Net Margin | [value] | [assessment] |
-| Debt/Equity | [value] | Low (<0.5) / Moderate (0.5-1.5) / High (>1.5) |
-| Current Ratio | [value] | Healthy (>1.5) / Adequate (1-1.5) / Tight (<1) |
-| Free Cash Flow | [value] | [positive/negative, trend] |
+Be specific with numbers. Identify any concerns or standout positives.
 
-Be specific with numbers. Identify any concerns or standout positives."""
+Finish with one plain line per metric as KEY: value | short assessment, then a line reading END_METRICS:
+REV: revenue
+RGR: revenue growth (Strong >15% / Moderate 5-15% / Weak <5%)
+GM: gross margin vs industry expectation
+OM: operating margin and trend
+NM: net margin
+DE: debt/equity (Low <0.5 / Moderate 0.5-1.5 / High >1.5)
+CR: current ratio (Healthy >1.5 / Adequate 1-1.5 / Tight <1)
+FCF: free cash flow, positive/negative and trend
 
-        try:
-            results["financials"] = self._call_api(financial_prompt, max_tokens=1800)
-        except Exception as e:
-            results["financials"] = f"[Financial analysis failed: {e}]"
-        
-        # Wait for rate limit reset
-        if progress_callback:
-            progress_callback("Waiting for rate limit reset...")
-        time.sleep(self.call_delay)
-        
-        # ==========================================
-        # CALL 2: TECHNICAL ANALYSIS
-        # ==========================================
-        if progress_callback:
-            progress_callback("Performing technical analysis (2/4)...")
-        
-        ta_prompt = f"""You are a technical analyst reviewing {company_name} ({ticker}).
-
-Here is the price and volume data:
+{length_directive}"""
 
-{price_data}
+_TECHNICAL_PROMPT_TEMPLATE = """You are a technical analyst reviewing {company_name} ({ticker}).
 
-Provide a THOROUGH technical analysis:
+Using the price and volume data above, provide a THOROUGH technical analysis:
 
 ## Primary Trend Assessment
 - What is the dominant trend? (Strong Uptrend / Uptrend / Sideways / Downtrend / Strong Downtrend)
@@ -186,27 +162,13 @@ Grading Criteria:
 
 **Key Levels to Watch:**
 - Upside target: $[X] (reason)
-- Downside risk: $[X] (reason)"""
+- Downside risk: $[X] (reason)
 
-        try:
-            results["technical"] = self._call_api(ta_prompt, max_tokens=1600)
-        except Exception as e:
-            results["technical"] = f"[Technical analysis failed: {e}]"
-        
-        # Wait for rate limit reset
-        if progress_callback:
-            progress_callback("Waiting for rate limit reset...")
-        time.sleep(self.call_delay)
-        
-        # ==========================================
-        # CALL 3: COMPETITIVE MOAT ANALYSIS
-        # ==========================================
-        if progress_callback:
-            progress_callback("Analyzing competitive positioning & moat (3/4)...")
-        
-        moat_prompt = f"""You are analyzing the competitive position and moat of {company_name} ({ticker}).
+{length_directive}"""
 
-Based on your knowledge of this company and its industry, provide:
+_COMPETITIVE_PROMPT_TEMPLATE = """You are analyzing the competitive position and moat of {company_name} ({ticker}).
+
+Based on your knowledge of this company and its industry, and the data above, provide:
 
 ## Business Overview
 - What does {company_name} do? (2-3 sentences)
@@ -256,41 +218,11 @@ Explanation: (2-3 sentences)
 2. [Risk 2]
 
 ## Durable Competitive Advantage?
-Can {company_name} sustain its market position over 5-10 years? Why or why not? (2-3 sentences)"""
+Can {company_name} sustain its market position over 5-10 years? Why or why not? (2-3 sentences)
 
-        try:
-            results["competitive"] = self._call_api(moat_prompt, max_tokens=1600)
-        except Exception as e:
-            results["competitive"] = f"[Competitive analysis failed: {e}]"
-        
-        # Wait for rate limit reset
-        if progress_callback:
-            progress_callback("Waiting for rate limit reset...")
-        time.sleep(self.call_delay)
-        
-        # ==========================================
-        # CALL 4: INVESTMENT SUMMARY
-        # ==========================================
-        if progress_callback:
-            progress_callback("Generating investment summary (4/4)...")
-        
-        # Truncate previous results for summary context
-        fin_summary = results.get("financials", "")[:1500]
-        ta_summary = results.get("technical", "")[:1000]
-        comp_summary = results.get("competitive", "")[:1000]
-        
-        summary_prompt = f"""Based on this analysis of {company_name} ({ticker}), create an investment summary.
+{length_directive}"""
 
-Financial Analysis Summary:
-{fin_summary}
-
-Technical Analysis Summary:
-{ta_summary}
-
-Competitive Analysis Summary:
-{comp_summary}
-
-Provide:
+_SUMMARY_INSTRUCTIONS_TEMPLATE = """Provide:
 
 ## Investment Thesis Summary
 In 2-3 sentences, what's the core investment case for or against {company_name}?
@@ -326,28 +258,11 @@ Combining financials, technicals, and competitive position:
 
 **Rationale:** (2-3 sentences)
 
-Note: This analysis uses financial data from Yahoo Finance and does not include real-time news. Always verify with current information before making investment decisions."""
+Note: This analysis uses financial data from Yahoo Finance and does not include real-time news. Always verify with current information before making investment decisions.
 
-        try:
-            results["summary"] = self._call_api(summary_prompt, max_tokens=1400)
-        except Exception as e:
-            results["summary"] = f"[Summary failed: {e}]"
-        
-        # ==========================================
-        # PROCESS SUPPLEMENTAL FILES (if any)
-        # ==========================================
-        supplemental_outputs = []
-        if supplemental_contents:
-            time.sleep(45)
-            for i, item in enumerate(supplemental_contents):
-                if progress_callback:
-                    progress_callback(f"Analyzing uploaded file {i+1}...")
-                
-                if item.get("type") == "image":
-                    output = self._analyze_image(ticker, company_name, item)
-                else:
-                    content = item.get("content", "")[:3000]
-                    prompt = f"""Analyze this document for {company_name} ({ticker}) investment research:
+{length_directive}"""
+
+_SUPPLEMENTAL_PROMPT_TEMPLATE = """Analyze this document for {company_name} ({ticker}) investment research:
 
 {content}
 
@@ -357,18 +272,871 @@ Provide:
 3. **Numbers/Data:** Any specific figures that matter
 4. **Thesis Impact:** Bullish / Bearish / Neutral signal, and why
 
-Keep response focused and actionable."""
-                    
-                    try:
-                        output = self._call_api(prompt, max_tokens=600)
-                    except Exception as e:
-                        output = f"[Failed: {e}]"
-                
-                supplemental_outputs.append(f"### {item.get('name', 'Uploaded File')}\n{output}")
+Keep response focused and actionable. {length_directive}"""
+
+
+_DOCUMENT_GROUP_PROMPT_TEMPLATE = """Analyze each document below for {company_name} ({ticker}) investment research:
+
+{docs}
+
+For each document, write a section headed "## Doc N" (N = its id) covering:
+1. **Document Type:** What is this?
+2. **Key Insights:** 3-5 most important points for investment thesis
+3. **Numbers/Data:** Any specific figures that matter
+4. **Thesis Impact:** Bullish / Bearish / Neutral signal, and why
+
+Keep each section focused and actionable, under {word_budget} words."""
+
+
+# Digest of every prompt template and the metrics table labels, part of the
+# run-level cache key so editing a prompt invalidates cached reports
+_PROMPTS_DIGEST = hashlib.blake2b(
+    "\0".join((
+        _SYSTEM_PROMPT, _IMAGE_PROMPT_TEMPLATE, _SHARED_DATA_TEMPLATE, _FINANCIAL_PROMPT_TEMPLATE,
+        _TECHNICAL_PROMPT_TEMPLATE, _COMPETITIVE_PROMPT_TEMPLATE, _SUMMARY_INSTRUCTIONS_TEMPLATE,
+        _SUPPLEMENTAL_PROMPT_TEMPLATE, _DOCUMENT_GROUP_PROMPT_TEMPLATE, repr(METRICS),
+    )).encode("utf-8"),
+    digest_size=16,
+).hexdigest()
+
+
+def _upload_bytes(item: Dict[str, Any]) -> bytes:
+    """Raw bytes of an uploaded item's content (text is UTF-8 encoded)."""
+    content = item.get("content") or b""
+    return content.encode("utf-8") if isinstance(content, str) else content
+
+
+class _StreamHead:
+    """Leading characters of a streamed section, with an event set once they're in."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.ready = asyncio.Event()
+        self._parts: List[str] = []
+        self._length = 0
+
+    def feed(self, delta: str) -> None:
+        """on_delta callback: collect text until the limit is reached."""
+        if self.ready.is_set():
+            return
+        self._parts.append(delta)
+        self._length += len(delta)
+        if self._length >= self.limit:
+            self.ready.set()
+
+    def finish(self, text: str) -> None:
+        """Use the finished section if it ended (or failed) before reaching the limit."""
+        if not self.ready.is_set():
+            self._parts = [text]
+            self.ready.set()
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+@functools.lru_cache(maxsize=32)
+def _encode_image(image_data: bytes) -> str:
+    """Base64-encode image bytes, memoized so re-submitted charts aren't re-encoded."""
+    return base64.standard_b64encode(image_data).decode("ascii")
+
+
+class LLMClient:
+    """
+    Claude API client optimized for deep analysis within rate limits.
+
+    Reuse one instance across analyses: its response cache and token
+    bucket only pay off when they outlive a single report.
+    """
+
+    # Output budget per call
+    MAX_TOKENS = {
+        "financials": 1800,
+        "technical": 1600,
+        "competitive": 1600,
+        "summary": 1400,
+        "supplemental": 600,
+        "image": 400,
+    }
+
+    # Prompt-cache breakpoint marker, shared rather than rebuilt per request
+    _EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+    # Smallest prefix the API will cache, and how long calls 2-3 wait for it
+    MIN_CACHEABLE_TOKENS = 1024
+    PREFIX_WAIT_SECONDS = 10.0
+
+    # Characters of each section the summary reads (call 4 starts as soon
+    # as every section has streamed this much, not after its last token)
+    SUMMARY_CONTEXT_CHARS = {"financials": 1500, "technical": 1000, "competitive": 1000}
+
+    # Text uploads are packed into shared prompts up to this many characters,
+    # each contributing at most UPLOAD_EXCERPT_CHARS (~750 tokens)
+    UPLOAD_BATCH_CHARS = 8000
+    UPLOAD_EXCERPT_CHARS = 3000
+
+    # What an upload excerpt should favor when a document is too long to send whole
+    UPLOAD_QUERY = (
+        "revenue sales growth margin earnings eps guidance outlook cash flow debt "
+        "valuation target price rating risk competition market share"
+    )
+
+    # Transient client errors worth retrying (timeouts, conflicts, 429); every
+    # 5xx, including 529 overloaded, is retried as well
+    RETRYABLE_STATUS_CODES = {408, 409, 429}
+    MAX_ATTEMPTS = 5
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        max_concurrency: int = 8,
+        cache_dir: Optional[str] = ".cache/llm",
+        cache_ttl: int = 86400,
+        upload_concurrency: int = 4,
+        tokens_per_minute: Optional[int] = 30000,
+        fast_model: Optional[str] = "claude-haiku-4-5-20251001",
+        use_batch_api: bool = False,
+    ):
+        self._api_key = api_key
+        self._client: Optional[anthropic.AsyncAnthropic] = None
+        self.model = model
+        # Short upload triage (files, images) runs on the cheaper, faster
+        # model; the report sections stay on model (None = model for all)
+        self.fast_model = fast_model or model
+        self.temperature = 0.2
+        # In-flight request caps per lane: report sections vs uploaded files,
+        # so a stack of uploads can't queue the sections behind it
+        self.lane_limits = {"sections": max_concurrency, "uploads": upload_concurrency}
+        self.retry_delay = 5.0  # base seconds for jittered backoff
+        # Default for arun_full_analysis(use_batch_api=...), for clients that
+        # only run non-interactive jobs
+        self.use_batch_api = use_batch_api
+        self.cache = ResponseCache(cache_dir, default_ttl=cache_ttl)
+        # Paces requests against the account's token budget (None = no pacing)
+        self.rate_limiter = TokenBucket.per_minute(tokens_per_minute) if tokens_per_minute else None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop = None
+
+    @property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """
+        Anthropic client backed by one pooled HTTP connection set.
+
+        Built on first use so the pool belongs to the running event loop;
+        HTTP/2 is used when the optional h2 package is installed. Idle
+        connections are kept long enough to carry over from the section
+        calls to the summary, and the read timeout leaves room for a full
+        non-streamed section. The SDK's own retries are off so _call_api's
+        backoff is the only retry layer.
+        """
+        if self._client is None:
+            # The SDK's own httpx client class and Limits type, so the pool
+            # matches whichever httpx build the installed SDK is tied to
+            http_client = anthropic.DefaultAsyncHttpxClient(
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=type(anthropic.DEFAULT_CONNECTION_LIMITS)(
+                    max_connections=100, max_keepalive_connections=50, keepalive_expiry=120
+                ),
+            )
+            self._client = anthropic.AsyncAnthropic(
+                api_key=self._api_key,
+                http_client=http_client,
+                timeout=anthropic.Timeout(120.0, connect=10.0),
+                max_retries=0,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Release pooled connections; the next request opens a fresh pool."""
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    async def __aenter__(self) -> "LLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _word_budget(self, section: str) -> int:
+        """Words that fit inside the section's max_tokens."""
+        # ~0.75 words per token, less headroom so answers finish rather than truncate
+        return int(self.MAX_TOKENS[section] * 0.6) // 50 * 50
+
+    def _length_directive(self, section: str) -> str:
+        """Explicit word cap for a prompt, sized to fit inside the section's max_tokens."""
+        return f"Respond in under {self._word_budget(section)} words."
+
+    def _request_slot(self, lane: str = "sections") -> asyncio.Semaphore:
+        """Semaphore shared by every API request in a lane on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.lane_limits.items()}
+            self._semaphore_loop = loop
+        return self._semaphores[lane]
+
+    def _retry_delay_for(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying: the server's retry-after if sent, else decorrelated jitter."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return random.uniform(self.retry_delay, min(60.0, self.retry_delay * 3 * 2 ** attempt))
+
+    @staticmethod
+    def _extract_text(message: Any) -> str:
+        """Concatenate the text blocks of a Messages API response."""
+        content = message.content
+        if len(content) == 1 and content[0].type == "text":
+            return content[0].text
+        return "".join(b.text for b in content if b.type == "text")
+
+    @staticmethod
+    def _estimate_tokens(prompt: Union[str, List[Dict[str, Any]]], max_tokens: int) -> int:
+        """Rough input + output tokens for a request (~4 chars per token, ~1,600 per image)."""
+        if isinstance(prompt, str):
+            chars, images = len(prompt), 0
+        else:
+            chars = sum(len(block.get("text", "")) for block in prompt)
+            images = sum(1 for block in prompt if block.get("type") == "image")
+        return chars // 4 + images * 1600 + max_tokens
+
+    def _request_params(
+        self, prompt: Union[str, List[Dict[str, Any]]], max_tokens: int, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build messages.create parameters for a single-turn prompt (model defaults to self.model)."""
+        return {
+            "model": model or self.model,
+            "max_tokens": max_tokens,
+            "temperature": self.temperature,
+            "system": _SYSTEM_PROMPT,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+
+    async def _call_api(
+        self,
+        prompt: Union[str, List[Dict[str, Any]]],
+        max_tokens: int = 1500,
+        cache_bypass: bool = False,
+        stream: bool = False,
+        on_delta: Optional[Callable[[str], None]] = None,
+        lane: str = "sections",
+        stage: str = "",
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        Make API call with retry on rate limit, served from the response cache when possible.
+        
+        The prompt is either plain text or a list of content blocks, which
+        lets callers mark stable prefixes with cache_control. With
+        stream=True the response is read incrementally and each text delta
+        is passed to on_delta as it arrives (a cache hit is delivered as a
+        single delta). lane picks the concurrency pool the request waits in;
+        stage labels the timings reported to the run's on_metrics callback.
+        model overrides self.model for this request.
+        """
+        started = time.perf_counter()
+        model = model or self.model
+        key = ResponseCache.make_key(model, max_tokens, self.temperature, _SYSTEM_PROMPT, prompt)
+        if not (cache_bypass or _CACHE_BYPASS.get()):
+            cached = self.cache.get(key)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached)
+                _emit_metrics(stage=stage, cached=True, e2e=time.perf_counter() - started)
+                return cached
+        
+        request = self._request_params(prompt, max_tokens, model)
+        estimate = self._estimate_tokens(prompt, max_tokens)
+        
+        for attempt in range(self.MAX_ATTEMPTS):
+            last_attempt = attempt == self.MAX_ATTEMPTS - 1
+            reserved = 0
+            try:
+                ttft = None
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(estimate)
+                    reserved = estimate
+                async with self._request_slot(lane):
+                    sent = time.perf_counter()
+                    if stream:
+                        buffer = io.StringIO()
+                        async with self.client.messages.stream(**request) as response_stream:
+                            async for delta in response_stream.text_stream:
+                                if ttft is None:
+                                    ttft = time.perf_counter() - sent
+                                buffer.write(delta)
+                                if on_delta:
+                                    on_delta(delta)
+                            response = await response_stream.get_final_message()
+                        headers = response_stream.response.headers
+                        text = buffer.getvalue()
+                    else:
+                        raw = await self.client.messages.with_raw_response.create(**request)
+                        response = raw.parse()
+                        headers = raw.headers
+                        text = self._extract_text(response)
+                done = time.perf_counter()
+                self.cache.set(key, text)
                 
-                if i < len(supplemental_contents) - 1:
-                    time.sleep(45)
+                usage = response.usage
+                output_tokens = usage.output_tokens
+                if self.rate_limiter is not None:
+                    # Refund the over-estimate (or charge the shortfall)
+                    self.rate_limiter.reconcile(
+                        estimate,
+                        usage.input_tokens + (getattr(usage, "cache_creation_input_tokens", 0) or 0) + output_tokens,
+                    )
+                    # The server's own count also covers other clients on the same key
+                    remaining = headers.get("anthropic-ratelimit-tokens-remaining")
+                    if remaining:
+                        try:
+                            self.rate_limiter.observe(float(remaining))
+                        except ValueError:
+                            pass
+                _emit_metrics(
+                    stage=stage,
+                    cached=False,
+                    e2e=done - started,
+                    queued=sent - started,  # token bucket + lane slot
+                    ttft=ttft,
+                    tbt=(done - sent - ttft) / output_tokens if ttft is not None and output_tokens else None,
+                    input_tokens=usage.input_tokens,
+                    output_tokens=output_tokens,
+                    attempts=attempt + 1,
+                )
+                return text
+            except anthropic.APIStatusError as e:
+                if self.rate_limiter is not None:
+                    # A rejected request isn't billed: hand its reservation
+                    # back before the retry reserves again, then back off
+                    self.rate_limiter.reconcile(reserved, 0)
+                    if e.status_code == 429:
+                        self.rate_limiter.penalize()
+                retryable = e.status_code >= 500 or e.status_code in self.RETRYABLE_STATUS_CODES
+                if not retryable or last_attempt:
+                    raise
+                await asyncio.sleep(self._retry_delay_for(e, attempt))
+            except anthropic.APIConnectionError as e:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.reconcile(reserved, 0)
+                # Dropped connections and timeouts; a stream that already
+                # emitted text can't be replayed without duplicating it
+                if last_attempt or ttft is not None:
+                    raise
+                await asyncio.sleep(self._retry_delay_for(e, attempt))
+        return "[API call failed]"
+
+    def _shared_data_block(
+        self, ticker: str, company_name: str, financial_data: str, price_data: str
+    ) -> Dict[str, Any]:
+        """Data common to calls 1-3, sent first and marked as a prompt-cache prefix."""
+        return {
+            "type": "text",
+            "text": _SHARED_DATA_TEMPLATE.format(
+                company_name=company_name, ticker=ticker, financial_data=financial_data, price_data=price_data
+            ),
+            "cache_control": self._EPHEMERAL_CACHE,
+        }
+
+    def _financial_prompt(self, ticker: str, company_name: str, shared: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Prompt for call 1: deep financial analysis."""
+        instructions = _FINANCIAL_PROMPT_TEMPLATE.format(
+            company_name=company_name, ticker=ticker, length_directive=self._length_directive("financials")
+        )
+        return [shared, {"type": "text", "text": instructions}]
+
+    async def _analyze_financials(
+        self,
+        ticker: str,
+        company_name: str,
+        shared: Dict[str, Any],
+        prefix_ready: Optional[asyncio.Event] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Call 1: Deep financial analysis; sets prefix_ready once the shared prefix is cached."""
+        prompt = self._financial_prompt(ticker, company_name, shared)
+        
+        def on_section_delta(delta: str) -> None:
+            # The first streamed token means the server has prefilled (and cached) the prefix
+            if prefix_ready is not None:
+                prefix_ready.set()
+            if on_delta:
+                on_delta(delta)
+        
+        try:
+            return await self._call_api(
+                prompt,
+                max_tokens=self.MAX_TOKENS["financials"],
+                stream=prefix_ready is not None or on_delta is not None,
+                on_delta=on_section_delta,
+                stage="financials",
+            )
+        except Exception as e:
+            return f"[Financial analysis failed: {e}]"
+        finally:
+            if prefix_ready is not None:
+                prefix_ready.set()
+
+    def _technical_prompt(self, ticker: str, company_name: str, shared: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Prompt for call 2: technical analysis."""
+        instructions = _TECHNICAL_PROMPT_TEMPLATE.format(
+            company_name=company_name, ticker=ticker, length_directive=self._length_directive("technical")
+        )
+        return [shared, {"type": "text", "text": instructions}]
+
+    async def _analyze_technicals(
+        self,
+        ticker: str,
+        company_name: str,
+        shared: Dict[str, Any],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Call 2: Technical analysis, streamed to on_delta if given."""
+        prompt = self._technical_prompt(ticker, company_name, shared)
+        try:
+            return await self._call_api(
+                prompt,
+                max_tokens=self.MAX_TOKENS["technical"],
+                stream=on_delta is not None,
+                on_delta=on_delta,
+                stage="technical",
+            )
+        except Exception as e:
+            return f"[Technical analysis failed: {e}]"
+
+    def _competitive_prompt(self, ticker: str, company_name: str, shared: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Prompt for call 3: competitive moat analysis."""
+        instructions = _COMPETITIVE_PROMPT_TEMPLATE.format(
+            company_name=company_name, ticker=ticker, length_directive=self._length_directive("competitive")
+        )
+        return [shared, {"type": "text", "text": instructions}]
+
+    async def _analyze_competitive(
+        self,
+        ticker: str,
+        company_name: str,
+        shared: Dict[str, Any],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Call 3: Competitive moat analysis, streamed to on_delta if given."""
+        prompt = self._competitive_prompt(ticker, company_name, shared)
+        try:
+            return await self._call_api(
+                prompt,
+                max_tokens=self.MAX_TOKENS["competitive"],
+                stream=on_delta is not None,
+                on_delta=on_delta,
+                stage="competitive",
+            )
+        except Exception as e:
+            return f"[Competitive analysis failed: {e}]"
+
+    async def _after_prefix(self, prefix_ready: asyncio.Event, coro: Any) -> Any:
+        """Await coro once the shared prefix is cached, or after PREFIX_WAIT_SECONDS."""
+        try:
+            await asyncio.wait_for(prefix_ready.wait(), timeout=self.PREFIX_WAIT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        return await coro
+
+    @staticmethod
+    async def _filling_head(head: _StreamHead, coro: Any) -> Any:
+        """Await a section, releasing its head even if the section ends short or fails."""
+        result = ""
+        try:
+            result = await coro
+            return result
+        finally:
+            head.finish(result if isinstance(result, str) else "")
+
+    async def _summary_from_heads(
+        self,
+        ticker: str,
+        company_name: str,
+        heads: Dict[str, _StreamHead],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Call 4, started once every section has streamed the part the summary reads."""
+        await asyncio.gather(*(head.ready.wait() for head in heads.values()))
+        return await self._create_summary(
+            ticker, company_name, {name: head.text for name, head in heads.items()}, on_delta=on_delta
+        )
+
+    async def _create_summary(
+        self,
+        ticker: str,
+        company_name: str,
+        results: Dict[str, str],
+        on_delta: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """Call 4: Investment summary built from calls 1-3, streamed to on_delta if given."""
+        # Truncate previous results for summary context
+        limits = self.SUMMARY_CONTEXT_CHARS
+        fin_summary = results.get("financials", "")[:limits["financials"]]
+        ta_summary = results.get("technical", "")[:limits["technical"]]
+        comp_summary = results.get("competitive", "")[:limits["competitive"]]
+        
+        context = f"""Based on this analysis of {company_name} ({ticker}), create an investment summary.
+
+Financial Analysis Summary:
+{fin_summary}
+
+Technical Analysis Summary:
+{ta_summary}
+
+Competitive Analysis Summary:
+{comp_summary}
+
+"""
+        instructions = _SUMMARY_INSTRUCTIONS_TEMPLATE.format(
+            company_name=company_name, ticker=ticker, length_directive=self._length_directive("summary")
+        )
+
+        # The analysis excerpts are the bulk of the prompt and identical on
+        # retries/re-runs, but at the default SUMMARY_CONTEXT_CHARS they plus
+        # the system prompt fall short of MIN_CACHEABLE_TOKENS; only mark a
+        # cache breakpoint when the prefix is long enough to be cached
+        context_block = {"type": "text", "text": context}
+        if self._estimate_tokens(_SYSTEM_PROMPT + context, 0) >= self.MIN_CACHEABLE_TOKENS:
+            context_block["cache_control"] = self._EPHEMERAL_CACHE
+        summary_content = [context_block, {"type": "text", "text": instructions}]
+        
+        try:
+            return await self._call_api(
+                summary_content,
+                max_tokens=self.MAX_TOKENS["summary"],
+                stream=on_delta is not None,
+                on_delta=on_delta,
+                stage="summary",
+            )
+        except Exception as e:
+            return f"[Summary failed: {e}]"
+
+    def _upload_excerpt(self, ticker: str, company_name: str, item: Dict[str, Any]) -> str:
+        """Up to UPLOAD_EXCERPT_CHARS of an upload, keeping the passages most relevant to the analysis."""
+        compressor = RelevanceCompressor(f"{self.UPLOAD_QUERY} {ticker} {company_name}")
+        return compressor.compress(item.get("content", ""), self.UPLOAD_EXCERPT_CHARS)
+
+    def _supplemental_prompt(self, ticker: str, company_name: str, item: Dict[str, Any]) -> str:
+        """Prompt for one uploaded text document."""
+        content = self._upload_excerpt(ticker, company_name, item)
+        return _SUPPLEMENTAL_PROMPT_TEMPLATE.format(
+            company_name=company_name,
+            ticker=ticker,
+            content=content,
+            length_directive=self._length_directive("supplemental"),
+        )
+
+    async def _analyze_supplemental(self, ticker: str, company_name: str, item: Dict[str, Any]) -> str:
+        """Analyze one uploaded file (image or extracted text)."""
+        if item.get("type") == "image":
+            return await self._analyze_image(ticker, company_name, item)
+        
+        prompt = self._supplemental_prompt(ticker, company_name, item)
+        try:
+            return await self._call_api(
+                prompt,
+                max_tokens=self.MAX_TOKENS["supplemental"],
+                lane="uploads",
+                stage=f"upload:{item.get('name', 'file')}",
+                model=self.fast_model,
+            )
+        except Exception as e:
+            return f"[Failed: {e}]"
+
+    def _document_group_prompt(self, ticker: str, company_name: str, items: List[Dict[str, Any]]) -> str:
+        """Prompt covering several uploaded text documents in one call."""
+        docs = "\n\n".join(
+            f'<doc id="{n}" name="{item.get("name", "Uploaded File")}">\n'
+            f'{self._upload_excerpt(ticker, company_name, item)}\n</doc>'
+            for n, item in enumerate(items, 1)
+        )
+        return _DOCUMENT_GROUP_PROMPT_TEMPLATE.format(
+            company_name=company_name, ticker=ticker, docs=docs, word_budget=self._word_budget("supplemental")
+        )
+
+    def _pack_documents(self, items: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group text uploads (by index) so each group's content fits in UPLOAD_BATCH_CHARS."""
+        groups, current, size = [], [], 0
+        for i, item in enumerate(items):
+            length = min(len(item.get("content", "")), self.UPLOAD_EXCERPT_CHARS)
+            if current and size + length > self.UPLOAD_BATCH_CHARS:
+                groups.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += length
+        if current:
+            groups.append(current)
+        return groups
+
+    async def _analyze_document_group(
+        self, ticker: str, company_name: str, items: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Analyze several text uploads in one call and split the reply per document."""
+        if len(items) == 1:
+            return [await self._analyze_supplemental(ticker, company_name, items[0])]
+        
+        prompt = self._document_group_prompt(ticker, company_name, items)
+        try:
+            text = await self._call_api(
+                prompt,
+                max_tokens=self.MAX_TOKENS["supplemental"] * len(items),
+                lane="uploads",
+                stage=f"upload:{len(items)} documents",
+                model=self.fast_model,
+            )
+        except Exception as e:
+            return [f"[Failed: {e}]"] * len(items)
+        
+        # re.split yields [preamble, id, body, id, body, ...]
+        parts = re.split(r"^#+\s*Doc\s+(\d+)\s*$", text, flags=re.MULTILINE)
+        sections = {int(doc_id): body.strip() for doc_id, body in zip(parts[1::2], parts[2::2])}
+        return [sections.get(n, "[No analysis returned for this document]") for n in range(1, len(items) + 1)]
+
+    async def _analyze_uploads(
+        self, ticker: str, company_name: str, items: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Analyze every upload: images one call each, text packed into shared prompts.
+        
+        Returns:
+            One output per item, in order
+        """
+        images = [i for i, item in enumerate(items) if item.get("type") == "image"]
+        texts = [i for i, item in enumerate(items) if item.get("type") != "image"]
+        groups = [[texts[j] for j in group] for group in self._pack_documents([items[i] for i in texts])]
+        
+        image_outputs, group_outputs = await asyncio.gather(
+            asyncio.gather(*[self._analyze_image(ticker, company_name, items[i]) for i in images]),
+            asyncio.gather(*[
+                self._analyze_document_group(ticker, company_name, [items[i] for i in group])
+                for group in groups
+            ]),
+        )
+        
+        outputs: List[str] = [""] * len(items)
+        for i, output in zip(images, image_outputs):
+            outputs[i] = output
+        for group, group_output in zip(groups, group_outputs):
+            for i, output in zip(group, group_output):
+                outputs[i] = output
+        return outputs
+
+    @staticmethod
+    async def _report_progress(progress_callback: Optional[Callable[[str], Any]], message: str) -> None:
+        """Pass a status message to progress_callback, awaiting it if it is async."""
+        if progress_callback is None:
+            return
+        result = progress_callback(message)
+        if inspect.isawaitable(result):
+            await result
+
+    async def arun_full_analysis(
+        self,
+        ticker: str,
+        company_name: str,
+        financial_data: str,
+        price_data: str,
+        supplemental_contents: Optional[List[Dict[str, Any]]] = None,
+        progress_callback: Optional[Callable[[str], Any]] = None,
+        on_delta: Optional[Callable[[str], None]] = None,
+        use_batch_api: Optional[bool] = None,
+        technical_override: Optional[str] = None,
+        force_refresh: bool = False,
+        on_metrics: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, str]:
+        """
+        Run comprehensive analysis with 4 focused API calls.
+        
+        Calls 1-3 and any supplemental file analyses are independent, so
+        they are all submitted at once and awaited together:
+        
+        Call 1: Deep Financial Analysis
+        Call 2: Technical Analysis  
+        Call 3: Competitive Moat Analysis
+        Call 4: Investment Summary (needs the output of calls 1-3)
+        
+        progress_callback receives short status messages; it may be a plain
+        function (called inline, as Streamlit widgets must be updated from
+        the script thread) or a coroutine function, which is awaited.
+        
+        If on_delta is given, the summary is streamed and each text chunk
+        is passed to it as soon as it arrives.
+        
+        With use_batch_api=True, calls 1-3 and the text supplementals are
+        submitted as one Message Batches job instead (half the token
+        price, but results can take minutes) - meant for non-interactive
+        runs such as a scheduled portfolio refresh. None uses the
+        client's use_batch_api setting.
+        
+        technical_override, when given, is used as the technical section
+        in place of call 2 - e.g. a TechnicalIndicators grade for a chart
+        whose signals all agree.
+        
+        Complete results are memoized on the inputs, so an identical rerun
+        returns immediately. force_refresh=True skips that lookup and the
+        per-call response cache.
+        
+        on_metrics, if given, receives one dict per API call with its stage
+        name and timings - e2e, queued (waiting for a slot), ttft and tbt
+        when streamed - plus token counts, then a final "run" entry with
+        the total wall time.
+        """
+        
+        supplemental_contents = supplemental_contents or []
+        
+        run_key = self._run_key(
+            ticker, company_name, financial_data, price_data, supplemental_contents, technical_override
+        )
+        started = time.perf_counter()
+        if not force_refresh:
+            cached = self.cache.get(run_key)
+            if cached is not None:
+                # Copy so callers can't mutate the cached entry, and re-assemble
+                # the report so its Generated date is today's
+                results = dict(cached)
+                results["final_report"] = self._assemble_report(ticker, company_name, results)
+                await self._report_progress(progress_callback, "Loaded cached analysis.")
+                if on_delta:
+                    on_delta(results["summary"])
+                if on_metrics:
+                    on_metrics({"stage": "run", "cached": True, "e2e": time.perf_counter() - started})
+                return results
+        
+        if use_batch_api is None:
+            use_batch_api = self.use_batch_api
+        
+        bypass_token = _CACHE_BYPASS.set(force_refresh)
+        metrics_token = _METRICS_SINK.set(on_metrics)
+        try:
+            results, complete = await self._run_analysis(
+                ticker, company_name, financial_data, price_data, supplemental_contents,
+                progress_callback, on_delta, use_batch_api, technical_override,
+            )
+        finally:
+            _CACHE_BYPASS.reset(bypass_token)
+            _METRICS_SINK.reset(metrics_token)
         
+        if on_metrics:
+            on_metrics({"stage": "run", "cached": False, "e2e": time.perf_counter() - started})
+        
+        # Don't pin a run with a failed section or upload in the cache.
+        # final_report is left out: it carries the generation date and is
+        # re-assembled on a hit
+        if complete:
+            self.cache.set(run_key, {k: v for k, v in results.items() if k != "final_report"})
+        
+        return results
+
+    async def _run_analysis(
+        self,
+        ticker: str,
+        company_name: str,
+        financial_data: str,
+        price_data: str,
+        supplemental_contents: List[Dict[str, Any]],
+        progress_callback: Optional[Callable[[str], Any]],
+        on_delta: Optional[Callable[[str], None]],
+        use_batch_api: bool,
+        technical_override: Optional[str],
+    ) -> Tuple[Dict[str, str], bool]:
+        """
+        Run calls 1-4 and assemble the report (see arun_full_analysis).
+        
+        Returns:
+            The results, and whether every section and upload analysis
+            succeeded (failures are bracketed placeholders)
+        """
+        results = {}
+        
+        await self._report_progress(
+            progress_callback, "Running financial, technical & competitive analyses (1-3/4)..."
+        )
+        if supplemental_contents:
+            await self._report_progress(
+                progress_callback, f"Analyzing {len(supplemental_contents)} uploaded file(s)..."
+            )
+        
+        # Identical uploads (the same PDF dropped twice) are analyzed once
+        unique_uploads, upload_slots = self._dedupe_uploads(supplemental_contents)
+        
+        # Sections and uploads wait in separate _request_slot lanes, so a
+        # large upload set can't flood the rate limit or delay the sections
+        if use_batch_api:
+            outputs = await self._run_sections_batched(
+                ticker, company_name, financial_data, price_data, unique_uploads, technical_override
+            )
+            section_outputs = outputs[:3]
+            uploads_done = asyncio.sleep(0, result=outputs[3:])
+            summary_done = None
+        else:
+            uploads_done = asyncio.ensure_future(self._analyze_uploads(ticker, company_name, unique_uploads))
+            shared = self._shared_data_block(ticker, company_name, financial_data, price_data)
+            
+            # A prefix is only cached once a request has prefilled it, so when
+            # it is big enough to cache, calls 2-3 start after call 1's first token
+            prefix_ready = asyncio.Event()
+            if self._estimate_tokens(shared["text"], 0) < self.MIN_CACHEABLE_TOKENS:
+                prefix_ready.set()
+            
+            # Calls 1-3 stream into heads; the summary starts once each has
+            # produced the excerpt it reads, overlapping their remaining tokens
+            heads = {name: _StreamHead(limit) for name, limit in self.SUMMARY_CONTEXT_CHARS.items()}
+            summary_done = asyncio.ensure_future(self._summary_from_heads(ticker, company_name, heads, on_delta))
+            
+            section_outputs = await asyncio.gather(
+                self._filling_head(
+                    heads["financials"],
+                    self._analyze_financials(ticker, company_name, shared, prefix_ready, heads["financials"].feed),
+                ),
+                self._filling_head(
+                    heads["technical"],
+                    self._after_prefix(
+                        prefix_ready, self._analyze_technicals(ticker, company_name, shared, heads["technical"].feed)
+                    )
+                    if technical_override is None
+                    else asyncio.sleep(0, result=technical_override),
+                ),
+                self._filling_head(
+                    heads["competitive"],
+                    self._after_prefix(
+                        prefix_ready, self._analyze_competitive(ticker, company_name, shared, heads["competitive"].feed)
+                    ),
+                ),
+                return_exceptions=True,
+            )
+        
+        results["financials"], results["technical"], results["competitive"] = section_outputs
+        if isinstance(results["financials"], str):
+            results["financials"] = render_metrics_table(
+                results["financials"], heading="## Key Metrics Summary Table"
+            )
+        
+        # ==========================================
+        # CALL 4: INVESTMENT SUMMARY
+        # ==========================================
+        await self._report_progress(progress_callback, "Generating investment summary (4/4)...")
+        
+        if summary_done is None:
+            summary_done = self._create_summary(ticker, company_name, results, on_delta=on_delta)
+        
+        # The summary only reads calls 1-3, so it finishes while uploads do
+        results["summary"], unique_outputs = await asyncio.gather(summary_done, uploads_done)
+        
+        # gather preserves order; fan each result back out to its duplicates
+        supplemental_outputs = []
+        uploads_ok = True
+        for item, slot in zip(supplemental_contents, upload_slots):
+            output = unique_outputs[slot]
+            if isinstance(output, Exception):
+                output = f"[Failed: {output}]"
+            uploads_ok = uploads_ok and not output.startswith("[")
+            supplemental_outputs.append(f"### {item.get('name', 'Uploaded File')}\n{output}")
         results["supplemental"] = "\n\n".join(supplemental_outputs) if supplemental_outputs else ""
         
         # ==========================================
@@ -377,44 +1145,201 @@ Keep response focused and actionable."""
         results["final_report"] = self._assemble_report(ticker, company_name, results)
         
         # Store section references for UI compatibility
-        results["overview"] = results.get("competitive", "").split("## Competitive Moat")[0] if "## Competitive Moat" in results.get("competitive", "") else ""
+        competitive = results.get("competitive", "")
+        moat_start = competitive.find("## Competitive Moat")
+        results["overview"] = competitive[:moat_start] if moat_start != -1 else ""
         results["sentiment"] = "See Summary section for market outlook and catalysts."
         
-        return results
+        complete = uploads_ok and not any(
+            results[k].startswith("[") for k in ("financials", "technical", "competitive", "summary")
+        )
+        return results, complete
 
-    def _analyze_image(self, ticker: str, company_name: str, item: dict) -> str:
-        """Analyze uploaded image."""
-        import base64
+    def _run_key(
+        self,
+        ticker: str,
+        company_name: str,
+        financial_data: str,
+        price_data: str,
+        supplemental_contents: List[Dict[str, Any]],
+        technical_override: Optional[str],
+    ) -> str:
+        """Cache key for a whole analysis run, built from digests of every input and the prompts."""
+        uploads = [
+            (item.get("name"), hashlib.blake2b(_upload_bytes(item), digest_size=16).hexdigest())
+            for item in supplemental_contents
+        ]
+        return ResponseCache.make_key(
+            "run", self.model, self.fast_model, self.temperature, _PROMPTS_DIGEST, ticker, company_name,
+            financial_data, price_data, technical_override or "", uploads,
+        )
+
+    @staticmethod
+    def _dedupe_uploads(items: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Collapse uploads with identical content.
         
-        try:
-            image_b64 = base64.standard_b64encode(item["content"]).decode("utf-8")
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=400,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": item.get("media_type", "image/png"),
-                                "data": image_b64,
-                            },
-                        },
-                        {
-                            "type": "text",
-                            "text": f"""Analyze this image for {company_name} ({ticker}) investment research.
+        Returns:
+            The unique items, and for each original item its index in that list
+        """
+        unique, slots, seen = [], [], {}
+        for item in items:
+            digest = hashlib.sha256(_upload_bytes(item)).digest()
+            if digest not in seen:
+                seen[digest] = len(unique)
+                unique.append(item)
+            slots.append(seen[digest])
+        return unique, slots
+
+    async def _run_sections_batched(
+        self,
+        ticker: str,
+        company_name: str,
+        financial_data: str,
+        price_data: str,
+        supplemental_contents: List[Dict[str, Any]],
+        technical_override: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Run calls 1-3 and text supplementals as one batch job.
+        
+        Images stay on the realtime path and run alongside the batch.
+        
+        Returns:
+            Outputs in the same order as the realtime gather
+        """
+        shared = self._shared_data_block(ticker, company_name, financial_data, price_data)
+        prompts = {
+            "financials": (self._financial_prompt(ticker, company_name, shared), self.MAX_TOKENS["financials"]),
+            "competitive": (self._competitive_prompt(ticker, company_name, shared), self.MAX_TOKENS["competitive"]),
+        }
+        if technical_override is None:
+            prompts["technical"] = (self._technical_prompt(ticker, company_name, shared), self.MAX_TOKENS["technical"])
+        image_indices = []
+        for i, item in enumerate(supplemental_contents):
+            if item.get("type") == "image":
+                image_indices.append(i)
+            else:
+                prompts[f"supplemental-{i}"] = (
+                    self._supplemental_prompt(ticker, company_name, item),
+                    self.MAX_TOKENS["supplemental"],
+                    self.fast_model,
+                )
+        
+        batch_outputs, *image_outputs = await asyncio.gather(
+            self._run_batch(prompts),
+            *[self._analyze_image(ticker, company_name, supplemental_contents[i]) for i in image_indices],
+            return_exceptions=True,
+        )
+        if isinstance(batch_outputs, Exception):
+            batch_outputs = {key: f"[Batch analysis failed: {batch_outputs}]" for key in prompts}
+        
+        technical = batch_outputs["technical"] if technical_override is None else technical_override
+        outputs = [batch_outputs["financials"], technical, batch_outputs["competitive"]]
+        images = dict(zip(image_indices, image_outputs))
+        for i in range(len(supplemental_contents)):
+            outputs.append(images[i] if i in images else batch_outputs[f"supplemental-{i}"])
+        return outputs
+
+    async def _run_batch(self, prompts: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Submit prompts through the Message Batches API and wait for the results.
+        
+        Cached responses are served directly; only misses are submitted.
+        
+        Args:
+            prompts: Mapping of custom_id -> (prompt, max_tokens[, model])
+            
+        Returns:
+            Mapping of custom_id -> response text
+        """
+        outputs = {}
+        keys = {}
+        requests = []
+        started = time.perf_counter()
+        for custom_id, (prompt, max_tokens, *model) in prompts.items():
+            model = model[0] if model else self.model
+            key = ResponseCache.make_key(model, max_tokens, self.temperature, _SYSTEM_PROMPT, prompt)
+            cached = None if _CACHE_BYPASS.get() else self.cache.get(key)
+            if cached is not None:
+                outputs[custom_id] = cached
+                continue
+            keys[custom_id] = key
+            requests.append({"custom_id": custom_id, "params": self._request_params(prompt, max_tokens, model)})
+        
+        if not requests:
+            return outputs
+        
+        batch = await self.client.messages.batches.create(requests=requests)
+        
+        # Batches usually finish within minutes; back off up to 30s between polls
+        delay = 5
+        while batch.processing_status != "ended":
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+            batch = await self.client.messages.batches.retrieve(batch.id)
+        
+        async for entry in await self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                text = self._extract_text(message)
+                self.cache.set(keys[entry.custom_id], text)
+                _emit_metrics(
+                    stage=entry.custom_id,
+                    cached=False,
+                    e2e=time.perf_counter() - started,
+                    input_tokens=message.usage.input_tokens,
+                    output_tokens=message.usage.output_tokens,
+                    batch=True,
+                )
+            else:
+                text = f"[Batch request {entry.result.type}]"
+            outputs[entry.custom_id] = text
+        
+        for custom_id in prompts:
+            outputs.setdefault(custom_id, "[Batch request missing from results]")
+        return outputs
 
-1. What does this image show?
-2. Key observations relevant to investment thesis
-3. Any specific levels, patterns, or data points of note
-4. Bullish/Bearish/Neutral implication"""
-                        },
-                    ],
-                }],
+    def run_full_analysis(self, *args, **kwargs) -> Dict[str, str]:
+        """Synchronous wrapper around arun_full_analysis for non-async callers."""
+        async def _run() -> Dict[str, str]:
+            try:
+                return await self.arun_full_analysis(*args, **kwargs)
+            finally:
+                # The pool is tied to this event loop, which asyncio.run closes
+                await self.aclose()
+
+        return asyncio.run(_run())
+
+    async def _analyze_image(self, ticker: str, company_name: str, item: dict) -> str:
+        """Analyze uploaded image."""
+        prompt_text = _IMAGE_PROMPT_TEMPLATE.format(
+            source_name=item.get("name", "uploaded image"),
+            company_name=company_name,
+            ticker=ticker,
+            length_directive=self._length_directive("image"),
+        )
+        content = [
+            {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": item.get("media_type", "image/png"),
+                    "data": _encode_image(item["content"]),
+                },
+                # Image leads the prompt, so repeat uploads hit the prefix cache
+                "cache_control": self._EPHEMERAL_CACHE,
+            },
+            {"type": "text", "text": prompt_text},
+        ]
+        try:
+            return await self._call_api(
+                content,
+                max_tokens=self.MAX_TOKENS["image"],
+                lane="uploads",
+                stage=f"upload:{item.get('name', 'image')}",
+                model=self.fast_model,
             )
-            return "".join(b.text for b in response.content if hasattr(b, "text"))
         except Exception as e:
             return f"[Image analysis failed: {e}]"
 
@@ -0,0 +1,94 @@
+"""
+Rate Limiter Module
+
+Token bucket that paces Claude requests against the account's
+tokens-per-minute budget, so bursts of concurrent calls queue briefly on
+the client instead of bouncing off 429 responses.
+"""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket using up-front reservations."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the bucket (starts full).
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens the bucket can hold
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    @classmethod
+    def per_minute(cls, tokens_per_minute: int) -> "TokenBucket":
+        """Create a bucket that allows a full minute's budget as a burst."""
+        return cls(rate=tokens_per_minute / 60, capacity=tokens_per_minute)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float) -> float:
+        """
+        Reserve tokens, sleeping until the reservation is covered.
+
+        The reservation is taken immediately, so the balance may go
+        negative; later callers see that debt and wait behind it. No lock
+        is needed because the bookkeeping never awaits.
+
+        Args:
+            tokens: Tokens the request is expected to consume
+
+        Returns:
+            Seconds spent waiting
+        """
+        self._refill()
+        self._tokens -= min(tokens, self.capacity)
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reconcile(self, reserved: float, used: float) -> None:
+        """
+        Settle a reservation against the tokens a request actually used.
+
+        Args:
+            reserved: Tokens passed to acquire()
+            used: Tokens reported in the response usage
+        """
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + min(reserved, self.capacity) - used)
+
+    def observe(self, remaining: float) -> None:
+        """
+        Lower the balance to the budget the server reports as remaining.
+
+        Only ever tightens the bucket: the local balance already accounts
+        for this process's queued reservations, while the server's figure
+        also sees usage from anywhere else sharing the API key.
+
+        Args:
+            remaining: Tokens left in the current window, per the response headers
+        """
+        self._refill()
+        self._tokens = min(self._tokens, remaining)
+
+    def penalize(self) -> None:
+        """Drain the bucket after a 429 so queued callers back off too."""
+        self._refill()
+        self._tokens = min(self._tokens, -self.rate)
+
+    @property
+    def available(self) -> float:
+        """Tokens currently available (negative while requests are queued)."""
+        self._refill()
+        return self._tokens
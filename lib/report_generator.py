@@ -5,222 +5,28 @@ Assembles the final report in HTML format and optionally exports to PDF.
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable
+import functools
+import io
 import re
 
+_HEADING = re.compile(r"^(#{1,3}) (.+)$")
+_INLINE = re.compile(r"\*\*(.+?)\*\*|\*(.+?)\*")
+_HORIZONTAL_RULE = re.compile(r"^---+$")
+_TABLE_SEPARATOR = re.compile(r"^\|[-:\s|]+\|$")
 
-class ReportGenerator:
-    """Generates formatted HTML reports from analysis outputs."""
-
-    def __init__(self, ticker: str, company_name: str):
-        """
-        Initialize the report generator.
-        
-        Args:
-            ticker: Stock ticker symbol
-            company_name: Full company name
-        """
-        self.ticker = ticker.upper()
-        self.company_name = company_name
 
-    def markdown_to_html(self, markdown_text: str) -> str:
-        """
-        Convert markdown text to HTML.
-        
-        Simple conversion for common markdown elements.
-        
-        Args:
-            markdown_text: Markdown formatted text
-            
-        Returns:
-            HTML formatted text
-        """
-        html = markdown_text
-        
-        # Headers
-        html = re.sub(r"^### (.+)$", r"<h3>\1</h3>", html, flags=re.MULTILINE)
-        html = re.sub(r"^## (.+)$", r"<h2>\1</h2>", html, flags=re.MULTILINE)
-        html = re.sub(r"^# (.+)$", r"<h1>\1</h1>", html, flags=re.MULTILINE)
-        
-        # Bold and italic
-        html = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", html)
-        html = re.sub(r"\*(.+?)\*", r"<em>\1</em>", html)
-        
-        # Bullet lists - handle nested
-        lines = html.split("\n")
-        in_list = False
-        new_lines = []
-        
-        for line in lines:
-            stripped = line.strip()
-            if stripped.startswith("- "):
-                if not in_list:
-                    new_lines.append("<ul>")
-                    in_list = True
-                new_lines.append(f"<li>{stripped[2:]}</li>")
-            else:
-                if in_list:
-                    new_lines.append("</ul>")
-                    in_list = False
-                new_lines.append(line)
-        
-        if in_list:
-            new_lines.append("</ul>")
-        
-        html = "\n".join(new_lines)
-        
-        # Tables
-        html = self._convert_tables(html)
-        
-        # Horizontal rules
-        html = re.sub(r"^---+$", "<hr>", html, flags=re.MULTILINE)
-        
-        # Paragraphs - wrap non-tagged text blocks
-        paragraphs = html.split("\n\n")
-        formatted_paragraphs = []
-        
-        for p in paragraphs:
-            p = p.strip()
-            if p and not p.startswith("<"):
-                # Check if it's a single line that might be part of a list or header
-                if not any(p.startswith(tag) for tag in ["<h", "<ul", "<ol", "<li", "<table", "<hr"]):
-                    p = f"<p>{p}</p>"
-            formatted_paragraphs.append(p)
-        
-        html = "\n\n".join(formatted_paragraphs)
-        
-        return html
-
-    def _convert_tables(self, text: str) -> str:
-        """Convert markdown tables to HTML tables."""
-        lines = text.split("\n")
-        result = []
-        table_lines = []
-        in_table = False
-        
-        for line in lines:
-            # Check if this looks like a table row
-            if "|" in line and line.strip().startswith("|"):
-                in_table = True
-                table_lines.append(line)
-            else:
-                if in_table:
-                    # Process collected table
-                    result.append(self._process_table(table_lines))
-                    table_lines = []
-                    in_table = False
-                result.append(line)
-        
-        # Handle table at end of text
-        if in_table and table_lines:
-            result.append(self._process_table(table_lines))
-        
-        return "\n".join(result)
-
-    def _process_table(self, lines: list) -> str:
-        """Convert markdown table lines to HTML table."""
-        if not lines:
-            return ""
-        
-        html_lines = ['<table class="data-table">']
-        
-        for i, line in enumerate(lines):
-            # Skip separator line (|---|---|)
-            if re.match(r"^\|[-:\s|]+\|$", line.strip()):
-                continue
-            
-            cells = [c.strip() for c in line.split("|")[1:-1]]
-            
-            if i == 0:
-                html_lines.append("<thead><tr>")
-                for cell in cells:
-                    html_lines.append(f"<th>{cell}</th>")
-                html_lines.append("</tr></thead><tbody>")
-            else:
-                html_lines.append("<tr>")
-                for cell in cells:
-                    html_lines.append(f"<td>{cell}</td>")
-                html_lines.append("</tr>")
-        
-        html_lines.append("</tbody></table>")
-        return "\n".join(html_lines)
+@functools.lru_cache(maxsize=1)
+def _mistune_renderer() -> Optional[Callable[[str], str]]:
+    """Shared mistune 3 renderer with tables enabled, or None if mistune isn't installed."""
+    try:
+        import mistune
+    except ImportError:
+        return None
+    return mistune.create_markdown(escape=False, plugins=["table", "strikethrough"])
 
-    def generate_html_report(
-        self,
-        report_content: str,
-        chart_html: Optional[str] = None,
-        include_styles: bool = True,
-    ) -> str:
-        """
-        Generate a complete HTML report.
-        
-        Args:
-            report_content: The synthesized report content (markdown)
-            chart_html: Optional Plotly chart HTML to embed
-            include_styles: Whether to include CSS styles
-            
-        Returns:
-            Complete HTML document
-        """
-        # Convert markdown to HTML
-        content_html = self.markdown_to_html(report_content)
-        
-        # Insert chart if provided
-        if chart_html:
-            # Find the Technical Analysis section and insert chart after TA Grade
-            chart_placeholder = "[Note: Chart will be inserted separately]"
-            if chart_placeholder in content_html:
-                content_html = content_html.replace(
-                    chart_placeholder,
-                    f'<div class="chart-container">{chart_html}</div>'
-                )
-            else:
-                # Try to insert after Technical Analysis section
-                ta_marker = "Technical Analysis"
-                if ta_marker in content_html:
-                    # Insert chart div after the section
-                    insert_pos = content_html.find("</h2>", content_html.find(ta_marker))
-                    if insert_pos > 0:
-                        content_html = (
-                            content_html[:insert_pos + 5] +
-                            f'\n<div class="chart-container">{chart_html}</div>\n' +
-                            content_html[insert_pos + 5:]
-                        )
-        
-        styles = self._get_styles() if include_styles else ""
-        
-        html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{self.company_name} ({self.ticker}) - Stock Analysis Report</title>
-    {styles}
-</head>
-<body>
-    <div class="report-container">
-        <header class="report-header">
-            <h1>{self.company_name} ({self.ticker})</h1>
-            <p class="report-date">Report Generated: {datetime.now().strftime("%B %d, %Y")}</p>
-        </header>
-        
-        <main class="report-content">
-            {content_html}
-        </main>
-        
-        <footer class="report-footer">
-            <p>Generated by Stock Analysis Report Generator</p>
-            <p class="disclaimer">This report is for informational purposes only and does not constitute investment advice.</p>
-        </footer>
-    </div>
-</body>
-</html>"""
-        
-        return html
 
-    def _get_styles(self) -> str:
-        """Get CSS styles for the report."""
-        return """
+_STYLES = """
     <style>
         :root {
             --primary-color: #1a365d;
@@ -373,6 +179,221 @@ class ReportGenerator:
         }
     </style>"""
 
+# Static page shell around the converted report; only the head varies per report
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{company_name} ({ticker}) - Stock Analysis Report</title>
+    {styles}
+</head>
+<body>
+    <div class="report-container">
+        <header class="report-header">
+            <h1>{company_name} ({ticker})</h1>
+            <p class="report-date">Report Generated: {report_date}</p>
+        </header>
+        
+        <main class="report-content">
+            """
+_HTML_TAIL = """
+        </main>
+        
+        <footer class="report-footer">
+            <p>Generated by Stock Analysis Report Generator</p>
+            <p class="disclaimer">This report is for informational purposes only and does not constitute investment advice.</p>
+        </footer>
+    </div>
+</body>
+</html>"""
+
+def _inline_html(match: "re.Match") -> str:
+    """Bold for **text**, italic for *text*."""
+    bold, italic = match.groups()
+    return f"<strong>{bold}</strong>" if bold is not None else f"<em>{italic}</em>"
+
+
+class ReportGenerator:
+    """Generates formatted HTML reports from analysis outputs."""
+
+    def __init__(self, ticker: str, company_name: str):
+        """
+        Initialize the report generator.
+        
+        Args:
+            ticker: Stock ticker symbol
+            company_name: Full company name
+        """
+        self.ticker = ticker.upper()
+        self.company_name = company_name
+
+    def markdown_to_html(self, markdown_text: str) -> str:
+        """
+        Convert markdown text to HTML.
+        
+        Uses mistune when installed (full CommonMark: nested lists, code,
+        links); otherwise falls back to the built-in converter.
+        
+        Args:
+            markdown_text: Markdown formatted text
+            
+        Returns:
+            HTML formatted text
+        """
+        renderer = _mistune_renderer()
+        if renderer is None:
+            return self._simple_markdown_to_html(markdown_text)
+        return renderer(markdown_text).replace("<table>", '<table class="data-table">')
+
+    def _simple_markdown_to_html(self, markdown_text: str) -> str:
+        """
+        Convert markdown text to HTML without third-party parsers.
+        
+        Simple conversion for common markdown elements, done in one forward
+        pass over the lines: headers, bold/italic, bullet lists, tables,
+        horizontal rules, and paragraphs for untagged blocks.
+        
+        Args:
+            markdown_text: Markdown formatted text
+            
+        Returns:
+            HTML formatted text
+        """
+        out = io.StringIO()
+        block: List[str] = []  # converted lines of the current blank-line-separated block
+        table_lines: List[str] = []
+        in_list = False
+        
+        def end_block() -> None:
+            text = "\n".join(block).strip()
+            block.clear()
+            if not text:
+                return
+            if out.tell():
+                out.write("\n\n")
+            # Wrap non-tagged text blocks in paragraphs
+            out.write(text if text.startswith("<") else f"<p>{text}</p>")
+        
+        for line in markdown_text.split("\n"):
+            heading = _HEADING.match(line)
+            if heading:
+                level = len(heading.group(1))
+                line = f"<h{level}>{heading.group(2)}</h{level}>"
+            line = _INLINE.sub(_inline_html, line)
+            stripped = line.strip()
+            
+            if table_lines and not stripped.startswith("|"):
+                block.append(self._process_table(table_lines))
+                table_lines = []
+            if in_list and not stripped.startswith("- "):
+                block.append("</ul>")
+                in_list = False
+            
+            if not line:
+                end_block()
+            elif stripped.startswith("- "):
+                if not in_list:
+                    block.append("<ul>")
+                    in_list = True
+                block.append(f"<li>{stripped[2:]}</li>")
+            elif stripped.startswith("|"):
+                table_lines.append(line)
+            elif _HORIZONTAL_RULE.match(line):
+                block.append("<hr>")
+            else:
+                block.append(line)
+        
+        if table_lines:
+            block.append(self._process_table(table_lines))
+        if in_list:
+            block.append("</ul>")
+        end_block()
+        
+        return out.getvalue()
+
+    def _process_table(self, lines: list) -> str:
+        """Convert markdown table lines to HTML table."""
+        if not lines:
+            return ""
+        
+        html_lines = ['<table class="data-table">']
+        
+        for i, line in enumerate(lines):
+            # Skip separator line (|---|---|)
+            if _TABLE_SEPARATOR.match(line.strip()):
+                continue
+            
+            cells = [c.strip() for c in line.split("|")[1:-1]]
+            
+            if i == 0:
+                html_lines.append("<thead><tr>")
+                for cell in cells:
+                    html_lines.append(f"<th>{cell}</th>")
+                html_lines.append("</tr></thead><tbody>")
+            else:
+                html_lines.append("<tr>")
+                for cell in cells:
+                    html_lines.append(f"<td>{cell}</td>")
+                html_lines.append("</tr>")
+        
+        html_lines.append("</tbody></table>")
+        return "\n".join(html_lines)
+
+    def generate_html_report(
+        self,
+        report_content: str,
+        chart_html: Optional[str] = None,
+        include_styles: bool = True,
+    ) -> str:
+        """
+        Generate a complete HTML report.
+        
+        Args:
+            report_content: The synthesized report content (markdown)
+            chart_html: Optional Plotly chart HTML to embed
+            include_styles: Whether to include CSS styles
+            
+        Returns:
+            Complete HTML document
+        """
+        # Convert markdown to HTML
+        content_html = self.markdown_to_html(report_content)
+        
+        # Insert chart if provided
+        if chart_html:
+            # Find the Technical Analysis section and insert chart after TA Grade
+            chart_placeholder = "[Note: Chart will be inserted separately]"
+            if chart_placeholder in content_html:
+                content_html = content_html.replace(
+                    chart_placeholder,
+                    f'<div class="chart-container">{chart_html}</div>'
+                )
+            else:
+                # Try to insert after Technical Analysis section
+                ta_marker = "Technical Analysis"
+                if ta_marker in content_html:
+                    # Insert chart div after the section
+                    insert_pos = content_html.find("</h2>", content_html.find(ta_marker))
+                    if insert_pos > 0:
+                        content_html = (
+                            content_html[:insert_pos + 5] +
+                            f'\n<div class="chart-container">{chart_html}</div>\n' +
+                            content_html[insert_pos + 5:]
+                        )
+        
+        head = _HTML_HEAD.format(
+            company_name=self.company_name,
+            ticker=self.ticker,
+            styles=_STYLES if include_styles else "",
+            report_date=datetime.now().strftime("%B %d, %Y"),
+        )
+        return "".join((head, content_html, _HTML_TAIL))
+
+    def _get_styles(self) -> str:
+        """Get CSS styles for the report."""
+        return _STYLES
+
     def export_to_pdf(self, html_content: str, output_path: str) -> bool:
         """
         Export HTML report to PDF.
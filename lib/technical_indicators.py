@@ -0,0 +1,203 @@
+"""
+Technical Indicators Module
+
+Computes moving averages, RSI and MACD from price history in plain
+pandas. The values are handed to the LLM as precomputed features, and
+when every signal points the same way the grade is decided here so the
+technical-analysis API call can be skipped.
+"""
+
+import pandas as pd
+from typing import Optional, Dict, Any
+
+
+class TechnicalIndicators:
+    """Deterministic indicator snapshot for one price history."""
+
+    RSI_PERIOD = 14
+    MACD_FAST = 12
+    MACD_SLOW = 26
+    MACD_SIGNAL = 9
+    LOOKBACK_DAYS = 60  # window for support/resistance and volume stats
+
+    def __init__(self, history: pd.DataFrame):
+        """
+        Initialize from price history.
+
+        Args:
+            history: DataFrame with Close, High, Low and Volume columns
+        """
+        self.history = history
+        self._signals: Optional[Dict[str, Any]] = None
+
+    def compute(self) -> Dict[str, Any]:
+        """
+        Compute the indicator snapshot for the most recent bar.
+
+        Returns:
+            Dictionary of indicator values (empty if data is insufficient)
+        """
+        if self._signals is not None:
+            return self._signals
+
+        df = self.history
+        if df is None or df.empty or any(c not in df.columns for c in ("Close", "High", "Low", "Volume")):
+            self._signals = {}
+            return self._signals
+
+        close = df["Close"].astype(float)
+        if len(close) < self.MACD_SLOW + self.MACD_SIGNAL:
+            self._signals = {}
+            return self._signals
+
+        sma50 = close.rolling(window=50).mean()
+        sma200 = close.rolling(window=200).mean()
+
+        # Wilder's RSI: exponential smoothing with alpha = 1/period
+        delta = close.diff()
+        avg_gain = delta.clip(lower=0).ewm(alpha=1 / self.RSI_PERIOD, adjust=False).mean()
+        avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / self.RSI_PERIOD, adjust=False).mean()
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+
+        macd = close.ewm(span=self.MACD_FAST, adjust=False).mean() - close.ewm(span=self.MACD_SLOW, adjust=False).mean()
+        macd_signal = macd.ewm(span=self.MACD_SIGNAL, adjust=False).mean()
+
+        recent = df.tail(self.LOOKBACK_DAYS)
+        recent_change = recent["Close"].astype(float).diff()
+        up_volume = recent.loc[recent_change > 0, "Volume"].mean()
+        down_volume = recent.loc[recent_change < 0, "Volume"].mean()
+
+        def last(series: pd.Series) -> Optional[float]:
+            value = series.iloc[-1]
+            return None if pd.isna(value) else float(value)
+
+        self._signals = {
+            "price": float(close.iloc[-1]),
+            "sma50": last(sma50),
+            "sma200": last(sma200),
+            "sma50_slope": last(sma50.diff(10)),
+            "rsi": last(rsi),
+            "macd": last(macd),
+            "macd_signal": last(macd_signal),
+            "macd_hist": last(macd - macd_signal),
+            "support": float(recent["Low"].min()),
+            "resistance": float(recent["High"].max()),
+            "up_down_volume": float(up_volume / down_volume) if pd.notna(down_volume) and down_volume and pd.notna(up_volume) else None,
+            "bars": len(close),
+        }
+        return self._signals
+
+    def grade(self) -> Dict[str, Any]:
+        """
+        Grade the chart when the signals agree.
+
+        Returns:
+            Dictionary with 'grade' (letter or None), 'decisive' (bool) and 'rationale'
+        """
+        s = self.compute()
+        if not s or s["sma200"] is None or s["rsi"] is None:
+            return {"grade": None, "decisive": False, "rationale": "Not enough history for a deterministic grade."}
+
+        price, sma50, sma200 = s["price"], s["sma50"], s["sma200"]
+        volume_ratio = s["up_down_volume"]
+        if volume_ratio is None:
+            return {"grade": None, "decisive": False, "rationale": "No volume split to confirm the trend."}
+        uptrend = price > sma50 > sma200 and s["sma50_slope"] > 0 and s["macd_hist"] > 0
+        downtrend = price < sma50 < sma200 and s["sma50_slope"] < 0 and s["macd_hist"] < 0
+
+        if uptrend and volume_ratio >= 1.0 and 50 <= s["rsi"] <= 70:
+            return {
+                "grade": "A",
+                "decisive": True,
+                "rationale": (
+                    f"Price is above a rising 50-day MA, which sits above the 200-day MA. "
+                    f"MACD is positive against its signal line and RSI of {s['rsi']:.0f} shows "
+                    f"momentum without being overbought. Volume is heavier on up days."
+                ),
+            }
+        if downtrend and volume_ratio < 1.0:
+            oversold = s["rsi"] < 30
+            return {
+                "grade": "F" if oversold else "D",
+                "decisive": True,
+                "rationale": (
+                    f"Price is below a falling 50-day MA, which sits below the 200-day MA. "
+                    f"MACD is negative against its signal line and volume is heavier on down days. "
+                    + (f"RSI of {s['rsi']:.0f} reflects capitulation-level selling." if oversold
+                       else f"RSI of {s['rsi']:.0f} shows no sign of a reversal.")
+                ),
+            }
+        return {"grade": None, "decisive": False, "rationale": "Signals are mixed; needs judgment."}
+
+    @property
+    def is_decisive(self) -> bool:
+        """Whether the grade can be issued without an LLM call."""
+        return self.grade()["decisive"]
+
+    def format_for_llm(self) -> str:
+        """
+        Format the indicator snapshot as a prompt block.
+
+        Returns:
+            Text block of precomputed indicators (empty if unavailable)
+        """
+        s = self.compute()
+        if not s:
+            return ""
+
+        def fmt(value: Optional[float], prefix: str = "", digits: int = 2) -> str:
+            return "N/A" if value is None else f"{prefix}{value:,.{digits}f}"
+
+        lines = [
+            "=== PRECOMPUTED INDICATORS ===",
+            f"RSI(14): {fmt(s['rsi'], digits=1)}",
+            f"MACD: {fmt(s['macd'])} (signal {fmt(s['macd_signal'])}, histogram {fmt(s['macd_hist'])})",
+            f"50-Day MA 10-day change: {fmt(s['sma50_slope'], '$')}",
+            f"{self.LOOKBACK_DAYS}-Day Support: {fmt(s['support'], '$')}",
+            f"{self.LOOKBACK_DAYS}-Day Resistance: {fmt(s['resistance'], '$')}",
+            f"Up/Down Day Volume Ratio: {fmt(s['up_down_volume'])}",
+        ]
+        return "\n".join(lines)
+
+    def to_markdown(self) -> str:
+        """
+        Render a technical-analysis section from the deterministic grade.
+
+        Returns:
+            Markdown in the same shape as the LLM technical section
+        """
+        s = self.compute()
+        verdict = self.grade()
+        trend = "Strong Uptrend" if verdict["grade"] == "A" else "Downtrend"
+
+        def vs(level: Optional[float]) -> str:
+            if level is None:
+                return "N/A"
+            return f"${level:,.2f} ({(s['price'] - level) / level * 100:+.1f}%)"
+
+        return f"""## Primary Trend Assessment
+- Dominant trend: {trend}
+- Price ${s['price']:,.2f} vs 50-day MA {vs(s['sma50'])} and 200-day MA {vs(s['sma200'])}
+
+## Momentum
+- RSI(14): {s['rsi']:.1f}
+- MACD histogram: {s['macd_hist']:+.2f}
+
+## Support & Resistance
+- Support: ${s['support']:,.2f} ({self.LOOKBACK_DAYS}-day low)
+- Resistance: ${s['resistance']:,.2f} ({self.LOOKBACK_DAYS}-day high)
+
+## Volume Analysis
+- Up/down day volume ratio: {s['up_down_volume']:.2f}
+
+## Technical Grade: {verdict['grade']}
+
+**Grade: {verdict['grade']}**
+
+**Rationale:** {verdict['rationale']}
+
+**Key Levels to Watch:**
+- Upside target: ${s['resistance']:,.2f} ({self.LOOKBACK_DAYS}-day high)
+- Downside risk: ${s['support']:,.2f} ({self.LOOKBACK_DAYS}-day low)
+
+*Graded from computed indicators; all signals agreed, so no model call was made.*"""
@@ -7,7 +7,9 @@ from .prompts import (
     get_technical_analysis_prompt,
     get_supplemental_analysis_prompt,
     get_synthesis_prompt,
+    build_batch_requests,
 )
+from .metrics import render_metrics_table
 
 __all__ = [
     "get_company_overview_prompt",
@@ -17,4 +19,6 @@ __all__ = [
     "get_technical_analysis_prompt",
     "get_supplemental_analysis_prompt",
     "get_synthesis_prompt",
+    "build_batch_requests",
+    "render_metrics_table",
 ]
@@ -0,0 +1,32 @@
+"""
+Prompt input budgeting.
+
+Caps the data interpolated into a prompt at an approximate token count, so
+an oversized payload (a raw data dump, a long upload) cannot balloon the
+request. Uses the same ~4 characters per token estimate as LLMClient.
+"""
+
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_NOTE = "[... truncated to fit the prompt budget]"
+
+
+def fit(text: str, max_tokens: int = 4000) -> str:
+    """
+    Trim text to roughly max_tokens, cutting at a line break where possible.
+
+    Args:
+        text: Data to embed in a prompt
+        max_tokens: Approximate token budget for the text
+
+    Returns:
+        The text unchanged if it fits, else its beginning followed by TRUNCATION_NOTE
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    # Fall back to a hard cut rather than losing most of the budget to one long line
+    if cut < max_chars // 2:
+        cut = max_chars
+    return f"{text[:cut].rstrip()}\n{TRUNCATION_NOTE}"
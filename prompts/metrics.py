@@ -0,0 +1,53 @@
+"""
+Key Metrics table rendering.
+
+The financial analysis prompts (prompt 2 here and LLMClient's own) ask for
+their metrics as compact KEY: value | assessment lines; this turns that
+block into the markdown table the report shows, so the model never spends
+output tokens on table scaffolding. Apply it to the model's answer, not
+inside a prompt builder.
+"""
+
+import re
+from typing import Optional
+
+# Metric keys the financial prompts may ask for, in table order
+METRICS = {
+    "REV": "Revenue (TTM)",
+    "RGR": "Revenue Growth (YoY)",
+    "GM": "Gross Margin",
+    "OM": "Operating Margin",
+    "NM": "Net Margin",
+    "DE": "Debt/Equity",
+    "CR": "Current Ratio",
+    "FCF": "Free Cash Flow",
+}
+
+_METRICS_BLOCK = re.compile(
+    r"^(?:```\w*\n)?((?:[ \t]*(?:%s)[ \t]*:.*\n)+)[ \t]*END_METRICS[ \t]*(?:\n```)?[ \t]*$"
+    % "|".join(METRICS),
+    re.MULTILINE,
+)
+
+
+def render_metrics_table(text: str, heading: Optional[str] = None) -> str:
+    """
+    Replace the KEY: value | assessment block in a financial analysis with a markdown table.
+
+    Args:
+        text: Output of a financial analysis prompt
+        heading: Line to put above the table (None = table only)
+
+    Returns:
+        The text with the block rendered as a table (unchanged if no block is found)
+    """
+    match = _METRICS_BLOCK.search(text)
+    if match is None:
+        return text
+    rows = [heading] if heading else []
+    rows += ["| Metric | Value | Assessment |", "|--------|-------|------------|"]
+    for line in match.group(1).splitlines():
+        key, _, rest = line.partition(":")
+        value, _, assessment = rest.partition("|")
+        rows.append(f"| {METRICS[key.strip()]} | {value.strip()} | {assessment.strip() or '—'} |")
+    return text[:match.start()] + "\n".join(rows) + text[match.end():]
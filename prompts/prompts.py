@@ -5,12 +5,46 @@ All prompts are designed to be used sequentially, with each producing
 focused output that feeds into the final synthesis.
 """
 
+import datetime
+import functools
+import string
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-def get_company_overview_prompt(ticker: str, company_name: str) -> str:
-    """Prompt 1: Establish what the company does, business model, and key context."""
-    return f"""You are analyzing {company_name} ({ticker}) for an investment research report.
+from ._truncate import fit
 
-Using web search, gather current information about this company and provide:
+# Approximate token cap on the data embedded in prompts 2, 5 and 6
+DATA_TOKEN_BUDGET = 4000
+
+_ANALYST_OPENER = "You are {role} {{company_name}} ({{ticker}}) for an investment research report."
+
+# Prompt id -> role in the opener; the ids match the custom_ids used by
+# build_batch_requests
+_ANALYST_ROLES = {
+    "overview": "analyzing",
+    "financial": "a financial analyst reviewing",
+    "competitive": "researching the competitive landscape of",
+    "sentiment": "conducting a sentiment analysis of",
+    "technical": "a technical analyst reviewing",
+    "supplemental": "analyzing supplemental research material on",
+}
+
+
+def _opener(prompt_id: str) -> str:
+    """First line of an analysis prompt, still holding the {company_name}/{ticker} fields."""
+    return _ANALYST_OPENER.format(role=_ANALYST_ROLES[prompt_id])
+
+
+def _pre_revenue_key(pre_revenue: Optional[bool]) -> Optional[bool]:
+    return None if pre_revenue is None else bool(pre_revenue)
+
+
+@functools.lru_cache(maxsize=512)
+def _company_prompt(template: str, ticker: str, company_name: str) -> str:
+    """Fill a prompt that depends only on the company; shared across re-runs."""
+    return template.format(company_name=company_name, ticker=ticker)
+
+
+_COMPANY_OVERVIEW_BODY = """Using web search, gather current information about this company and provide:
 
 1. **Business Description** (2-3 paragraphs)
    - What does the company do?
@@ -27,20 +61,38 @@ Using web search, gather current information about this company and provide:
    - Number of employees (approximate)
    - Current CEO
 
-If this is a PRE-REVENUE company, additionally address:
-- What specific problem is this company trying to solve?
+"""
+
+_PRE_REVENUE_QUESTIONS = """- What specific problem is this company trying to solve?
 - What are the potential applications of their technology/product?
 - What is the estimated total addressable market (TAM)?
-- What stage of development are they in (R&D, clinical trials, pilot customers, etc.)?
+- What stage of development are they in (R&D, clinical trials, pilot customers, etc.)?"""
+
+# Keyed by pre_revenue: None leaves the call to the model, True/False send
+# only the guidance that applies
+_COMPANY_OVERVIEW_TEMPLATES = {
+    pre_revenue: (
+        _opener("overview") + "\n\n" + _COMPANY_OVERVIEW_BODY + section
+        + "Write in a neutral, informative tone. Do not include investment recommendations in this section."
+    )
+    for pre_revenue, section in {
+        None: f"If this is a PRE-REVENUE company, additionally address:\n{_PRE_REVENUE_QUESTIONS}\n\n",
+        True: f"This is a PRE-REVENUE company, so also address:\n{_PRE_REVENUE_QUESTIONS}\n\n",
+        False: "",
+    }.items()
+}
+
 
-Write in a neutral, informative tone. Do not include investment recommendations in this section."""
+def get_company_overview_prompt(ticker: str, company_name: str, pre_revenue: Optional[bool] = None) -> str:
+    """Prompt 1: Establish what the company does, business model, and key context.
 
+    pre_revenue=None asks the model to judge; True/False include or drop the
+    pre-revenue questions outright.
+    """
+    return _company_prompt(_COMPANY_OVERVIEW_TEMPLATES[_pre_revenue_key(pre_revenue)], ticker, company_name)
 
-def get_financial_analysis_prompt(ticker: str, company_name: str, financial_data: str) -> str:
-    """Prompt 2: Analyze financial health using quantitative data."""
-    return f"""You are a financial analyst reviewing {company_name} ({ticker}).
 
-Here is the financial data:
+_FINANCIAL_ANALYSIS_BODY = """Here is the financial data:
 
 <financial_data>
 {financial_data}
@@ -70,29 +122,55 @@ Analyze this data and provide:
    - Free cash flow
    - Cash flow vs. net income (quality of earnings check)
 
-5. **Key Metrics Table**
-   Format as a simple table:
-   | Metric | Value | Assessment |
-   |--------|-------|------------|
-   | Revenue (TTM) | $X | — |
-   | Revenue Growth (YoY) | X% | Strong/Moderate/Weak |
-   | Gross Margin | X% | — |
-   | Net Margin | X% | — |
-   | Debt/Equity | X.X | Low/Moderate/High |
-   | Current Ratio | X.X | Healthy/Adequate/Tight |
-   | Free Cash Flow | $X | Positive/Negative |
-
-If data is missing or the company is pre-revenue, note what's unavailable and focus on:
-- Cash runway (how long can they operate at current burn rate?)
+5. **Key Metrics**
+   End your answer with one plain line per metric as KEY: value | assessment, then a line reading END_METRICS:
+   REV: revenue (TTM)
+   RGR: revenue growth YoY | Strong/Moderate/Weak
+   GM: gross margin
+   NM: net margin
+   DE: debt/equity | Low/Moderate/High
+   CR: current ratio | Healthy/Adequate/Tight
+   FCF: free cash flow | Positive/Negative
+   Write n/a for any value the data does not support.
+
+"""
+
+_PRE_REVENUE_FOCUS = """- Cash runway (how long can they operate at current burn rate?)
 - Funding history and last raise
-- Path to profitability (if stated)
+- Path to profitability (if stated)"""
+
+_FINANCIAL_ANALYSIS_TEMPLATES = {
+    pre_revenue: (
+        _opener("financial") + "\n\n" + _FINANCIAL_ANALYSIS_BODY + section
+        + "\n\nBe precise with numbers. If you're uncertain about a figure, say so rather than guessing."
+    )
+    for pre_revenue, section in {
+        None: (
+            "If data is missing or the company is pre-revenue, note what's unavailable "
+            f"and focus on:\n{_PRE_REVENUE_FOCUS}"
+        ),
+        True: f"The company is pre-revenue. Note what's unavailable and focus on:\n{_PRE_REVENUE_FOCUS}",
+        False: "If data is missing, note what's unavailable.",
+    }.items()
+}
+
+
+def get_financial_analysis_prompt(
+    ticker: str, company_name: str, financial_data: str, pre_revenue: Optional[bool] = None
+) -> str:
+    """Prompt 2: Analyze financial health using quantitative data.
 
-Be precise with numbers. If you're uncertain about a figure, say so rather than guessing."""
+    pre_revenue works as in get_company_overview_prompt. The answer ends
+    with a compact metrics block; pass it through
+    metrics.render_metrics_table before showing it or handing it to the
+    synthesis prompt.
+    """
+    return _FINANCIAL_ANALYSIS_TEMPLATES[_pre_revenue_key(pre_revenue)].format(
+        company_name=company_name, ticker=ticker, financial_data=fit(financial_data, DATA_TOKEN_BUDGET)
+    )
 
 
-def get_competitive_positioning_prompt(ticker: str, company_name: str) -> str:
-    """Prompt 3: Understand the competitive landscape and differentiation."""
-    return f"""You are researching the competitive landscape for {company_name} ({ticker}).
+_COMPETITIVE_POSITIONING_TEMPLATE = _opener("competitive") + """
 
 Using web search, analyze:
 
@@ -120,9 +198,12 @@ Be honest about uncertainty. If competitive advantages are weak or unclear, say
 Format as flowing paragraphs, not bullet points (except for the competitor list)."""
 
 
-def get_sentiment_analysis_prompt(ticker: str, company_name: str) -> str:
-    """Prompt 4: Assess recent news and market sentiment."""
-    return f"""You are conducting a sentiment analysis for {company_name} ({ticker}).
+def get_competitive_positioning_prompt(ticker: str, company_name: str) -> str:
+    """Prompt 3: Understand the competitive landscape and differentiation."""
+    return _company_prompt(_COMPETITIVE_POSITIONING_TEMPLATE, ticker, company_name)
+
+
+_SENTIMENT_ANALYSIS_TEMPLATE = _opener("sentiment") + """
 
 Using web search, find recent news from the past 30 days and analyze:
 
@@ -132,11 +213,11 @@ Using web search, find recent news from the past 30 days and analyze:
 
 2. **Sentiment Assessment**
    Based on the news flow and market commentary, assess overall sentiment:
-   
+
    - **Bullish**: Predominantly positive news, analyst upgrades, positive catalysts ahead
    - **Neutral**: Mixed news, no strong directional bias, wait-and-see mode
    - **Bearish**: Predominantly negative news, analyst downgrades, concerns mounting
-   
+
    State your assessment clearly: "Overall Sentiment: [Bullish/Neutral/Bearish]"
    Then explain why in 2-3 sentences.
 
@@ -152,9 +233,12 @@ Using web search, find recent news from the past 30 days and analyze:
 If news is sparse (common for smaller companies), note that and focus on whatever is available."""
 
 
-def get_technical_analysis_prompt(ticker: str, company_name: str, price_data: str) -> str:
-    """Prompt 5: Assess chart structure and provide a letter grade."""
-    return f"""You are a technical analyst reviewing {company_name} ({ticker}).
+def get_sentiment_analysis_prompt(ticker: str, company_name: str) -> str:
+    """Prompt 4: Assess recent news and market sentiment."""
+    return _company_prompt(_SENTIMENT_ANALYSIS_TEMPLATE, ticker, company_name)
+
+
+_TECHNICAL_ANALYSIS_TEMPLATE = _opener("technical") + """
 
 Here is the historical price and volume data:
 
@@ -185,9 +269,9 @@ Analyze this data and provide:
    - Is price action constructive or deteriorating?
 
 5. **TA Grade**
-   
+
    Assign a letter grade using this rubric:
-   
+
    | Grade | Criteria |
    |-------|----------|
    | A | Clear uptrend, increasing volume on up days, above key MAs, constructive patterns |
@@ -197,17 +281,20 @@ Analyze this data and provide:
    | F | Breakdown, capitulation volume, below all major MAs, no visible support |
 
    **TA Grade: [Letter]**
-   
+
    **Grade Rationale:** [2-3 sentences explaining why you assigned this grade]
 
 Keep analysis grounded in the data provided. Avoid overly bullish or bearish bias. If the data is limited, note that and provide what assessment you can."""
 
 
-def get_supplemental_analysis_prompt(
-    ticker: str, company_name: str, source_name: str, content: str
-) -> str:
-    """Prompt 6: Extract insights from user-uploaded files or links."""
-    return f"""You are analyzing supplemental research material for {company_name} ({ticker}).
+def get_technical_analysis_prompt(ticker: str, company_name: str, price_data: str) -> str:
+    """Prompt 5: Assess chart structure and provide a letter grade."""
+    return _TECHNICAL_ANALYSIS_TEMPLATE.format(
+        company_name=company_name, ticker=ticker, price_data=fit(price_data, DATA_TOKEN_BUDGET)
+    )
+
+
+_SUPPLEMENTAL_ANALYSIS_TEMPLATE = _opener("supplemental") + """
 
 Source: {source_name}
 
@@ -236,18 +323,16 @@ This content was provided as additional context for an investment analysis. Revi
 Be concise. Focus on what's actionable or insightful for investment analysis."""
 
 
-def get_synthesis_prompt(
-    ticker: str,
-    company_name: str,
-    overview_output: str,
-    financial_output: str,
-    competitive_output: str,
-    sentiment_output: str,
-    ta_output: str,
-    supplemental_output: str = "No supplemental materials provided.",
+def get_supplemental_analysis_prompt(
+    ticker: str, company_name: str, source_name: str, content: str
 ) -> str:
-    """Prompt 7: Assemble all analysis into a cohesive final report."""
-    return f"""You are compiling a final investment research report for {company_name} ({ticker}).
+    """Prompt 6: Extract insights from user-uploaded files or links."""
+    return _SUPPLEMENTAL_ANALYSIS_TEMPLATE.format(
+        company_name=company_name, ticker=ticker, source_name=source_name, content=fit(content, DATA_TOKEN_BUDGET)
+    )
+
+
+_SYNTHESIS_ANALYSES_TEMPLATE = """You are compiling a final investment research report for {company_name} ({ticker}).
 
 You have completed the following analyses:
 
@@ -271,16 +356,24 @@ You have completed the following analyses:
 {ta_output}
 </technical_analysis>
 
-<supplemental_analysis>
+"""
+
+# Placeholder callers used to pass for "no supplemental material"; it is
+# treated the same as an empty value
+NO_SUPPLEMENTAL = "No supplemental materials provided."
+
+_SYNTHESIS_SUPPLEMENTAL_TEMPLATE = """<supplemental_analysis>
 {supplemental_output}
 </supplemental_analysis>
 
-Compile these into a final report using this exact structure:
+"""
+
+_SYNTHESIS_STRUCTURE_HEAD = """Compile these into a final report using this exact structure:
 
 ---
 
 # {company_name} ({ticker})
-**Report Generated:** [Current Date]
+**Report Generated:** {report_date}
 
 ---
 
@@ -303,10 +396,16 @@ Compile these into a final report using this exact structure:
 
 [Note: Chart will be inserted separately]
 
-## 6. Supplemental Analysis
-[If supplemental materials were provided, insert that analysis here. If none, write "No supplemental materials provided."]
+"""
+
+_SYNTHESIS_SUPPLEMENTAL_SECTION = """## 6. Supplemental Analysis
+[Insert supplemental analysis]
+
+"""
 
-## 7. Summary & Key Considerations
+# The summary is section 6, or 7 after a supplemental section; the number
+# is filled in by get_synthesis_prompt
+_SYNTHESIS_STRUCTURE_TAIL = """## {summary_section}. Summary & Key Considerations
 
 **Bull Case:**
 - [Point 1]
@@ -335,3 +434,120 @@ Guidelines for synthesis:
 - If sections conflict, note the discrepancy rather than hiding it
 - Keep the report factual and balanced; avoid promotional language
 - Total report length should be 1,500-2,500 words"""
+
+# Keyed by whether supplemental analysis was provided; without it both the
+# input block and the report section are left out rather than filled with
+# a placeholder
+_SYNTHESIS_TEMPLATES = {
+    True: (
+        _SYNTHESIS_ANALYSES_TEMPLATE + _SYNTHESIS_SUPPLEMENTAL_TEMPLATE
+        + _SYNTHESIS_STRUCTURE_HEAD + _SYNTHESIS_SUPPLEMENTAL_SECTION + _SYNTHESIS_STRUCTURE_TAIL
+    ),
+    False: _SYNTHESIS_ANALYSES_TEMPLATE + _SYNTHESIS_STRUCTURE_HEAD + _SYNTHESIS_STRUCTURE_TAIL,
+}
+
+# (literal text, field name) pairs, split once at import so each call is a
+# single str.join that copies the section outputs into the prompt only once
+_SYNTHESIS_FRAGMENTS = {
+    has_supplemental: tuple(
+        (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+    )
+    for has_supplemental, template in _SYNTHESIS_TEMPLATES.items()
+}
+
+
+def get_synthesis_prompt(
+    ticker: str,
+    company_name: str,
+    overview_output: str,
+    financial_output: str,
+    competitive_output: str,
+    sentiment_output: str,
+    ta_output: str,
+    supplemental_output: Optional[str] = None,
+    report_date: Optional[str] = None,
+) -> str:
+    """Prompt 7: Assemble all analysis into a cohesive final report.
+
+    With no supplemental_output (None, empty, or the NO_SUPPLEMENTAL
+    placeholder) the supplemental block and report section are omitted
+    entirely. report_date defaults to today (ISO format).
+    """
+    has_supplemental = bool(supplemental_output) and supplemental_output.strip() != NO_SUPPLEMENTAL
+    values = {
+        "ticker": ticker,
+        "company_name": company_name,
+        "report_date": report_date or datetime.date.today().isoformat(),
+        "overview_output": overview_output,
+        "financial_output": financial_output,
+        "competitive_output": competitive_output,
+        "sentiment_output": sentiment_output,
+        "ta_output": ta_output,
+        "supplemental_output": supplemental_output,
+        "summary_section": "7" if has_supplemental else "6",
+    }
+    pieces = []
+    for literal, field in _SYNTHESIS_FRAGMENTS[has_supplemental]:
+        pieces.append(literal)
+        if field is not None:
+            pieces.append(values[field])
+    return "".join(pieces)
+
+
+def build_batch_requests(
+    ticker: str,
+    company_name: str,
+    financial_data: str,
+    price_data: str,
+    model: str,
+    max_tokens: int = 2000,
+    supplemental: Sequence[Tuple[str, str]] = (),
+    pre_revenue: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build the independent analysis prompts as one Message Batches request list.
+
+    Prompts 1-6 do not depend on each other, so they can go out together at
+    batch pricing; the synthesis prompt needs their outputs and is sent
+    afterwards. No cache_control is set: each prompt is well under the
+    API's minimum cacheable prefix, so a breakpoint would never be used.
+
+    Args:
+        ticker: Stock ticker symbol
+        company_name: Company name
+        financial_data: Formatted financial data for prompt 2
+        price_data: Formatted price data for prompt 5
+        model: Model ID for every request
+        max_tokens: Output limit for each request
+        supplemental: (source_name, content) pairs, one prompt 6 request each
+        pre_revenue: Passed to prompts 1 and 2 (None = let the model judge)
+
+    Returns:
+        Entries for client.messages.batches.create(requests=...), with
+        custom_ids overview, financial, competitive, sentiment, technical
+        and supplemental-N
+    """
+    prompts = [
+        ("overview", get_company_overview_prompt(ticker, company_name, pre_revenue=pre_revenue)),
+        ("financial", get_financial_analysis_prompt(ticker, company_name, financial_data, pre_revenue=pre_revenue)),
+        ("competitive", get_competitive_positioning_prompt(ticker, company_name)),
+        ("sentiment", get_sentiment_analysis_prompt(ticker, company_name)),
+        ("technical", get_technical_analysis_prompt(ticker, company_name, price_data)),
+    ]
+    for i, (source_name, content) in enumerate(supplemental):
+        prompts.append((
+            f"supplemental-{i}",
+            get_supplemental_analysis_prompt(ticker, company_name, source_name, content),
+        ))
+
+    return [
+        {
+            "custom_id": custom_id,
+            "params": {
+                "model": model,
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": prompt}],
+            },
+        }
+        for custom_id, prompt in prompts
+    ]